@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from agrotwin_metrics import metrics
+from agrotwin_files import atomic_open
+try:
+    from PIL import Image
+except ImportError:  # Headless runs only need the manifest; dimensions are then left unknown
+    Image = None
+
+# --- 1. BACKGROUND TEXTURE LOADING ---
+MAX_TEXTURE_SIDE = 1024
+
+def decode_image(path):
+    """Reads and decodes a scan photo off the render thread, downscaled for the UI panel."""
+    with Image.open(path) as img:
+        img = img.convert('RGBA')
+    img.thumbnail((MAX_TEXTURE_SIDE, MAX_TEXTURE_SIDE))
+    return img
+
+class TextureLoader:
+    """
+    Decodes images on worker threads and keeps the results in an LRU cache
+    bounded by `memory_budget` bytes (RGBA size of each decoded image).
+    Repeated requests for the same path share one decode. `finalize` turns a
+    decoded image into whatever the caller draws (e.g. an Ursina Texture) and
+    runs inside poll(), i.e. on the thread that owns the GPU context.
+    """
+    def __init__(self, memory_budget, finalize=lambda image: image, workers=2, decode=decode_image):
+        self.memory_budget = memory_budget
+        self.finalize = finalize
+        self.decode = decode
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="texture-loader")
+        self.lock = threading.Lock()
+        self.cache = OrderedDict()  # path -> (value, cost)
+        self.pending = {}           # path -> Future
+        self.failed = set()
+        self.used = 0
+
+    def request(self, path):
+        """Schedules a decode unless the image is cached, in flight or known to be broken."""
+        with self.lock:
+            if path in self.cache:
+                self.cache.move_to_end(path)
+                return
+            if path in self.pending or path in self.failed:
+                return
+            self.pending[path] = self.executor.submit(self.timed_decode, path)
+
+    def timed_decode(self, path):
+        with metrics.timed("texture_decode"):
+            return self.decode(path)
+
+    def prefetch(self, paths):
+        for path in paths:
+            self.request(path)
+
+    def ready(self, path):
+        return path in self.cache or path in self.failed
+
+    def get(self, path):
+        """Returns the finalized value for a cached path, or None."""
+        entry = self.cache.get(path)
+        if entry is None: return None
+        self.cache.move_to_end(path)
+        return entry[0]
+
+    def poll(self, max_finalize=2):
+        """Moves finished decodes into the cache; call once per frame from the render thread."""
+        with self.lock:
+            done = [path for path, future in self.pending.items() if future.done()][:max_finalize]
+            futures = [self.pending.pop(path) for path in done]
+        for path, future in zip(done, futures):
+            try:
+                image = future.result()
+            except Exception:
+                self.failed.add(path)
+                continue
+            cost = image.width * image.height * 4
+            self.cache[path] = (self.finalize(image), cost)
+            self.used += cost
+            self.evict()
+
+    def evict(self):
+        # Keep at least the most recent entry even if it alone exceeds the budget
+        while self.used > self.memory_budget and len(self.cache) > 1:
+            _, (_, cost) = self.cache.popitem(last=False)
+            self.used -= cost
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+# --- 2. ASSET MANIFEST ---
+MANIFEST_FILE = "asset_manifest.json"
+MANIFEST_VERSION = 1
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+def parse_asset_name(filename):
+    """'tomato-early_blight.JPG' -> ('Tomato', 'Early Blight'); names without a '-' are unknown."""
+    stem = os.path.splitext(filename)[0].strip()
+    if '-' not in stem: return "Unknown", "Unknown"
+    crop, disease = stem.split('-', 1)
+    return crop.strip().capitalize(), disease.replace('_', ' ').strip().title()
+
+def describe_scan(entry, is_defective):
+    """Returns (crop, disease, status) shown in a scan report for a manifest entry."""
+    if entry is None or entry['crop'] == "Unknown":
+        return "Unknown", "Unknown", "UNKNOWN STATUS"
+    if not is_defective:
+        return entry['crop'], "None (Healthy)", "HEALTHY"
+    return entry['crop'], entry['disease'], "DEFECTIVE / UNHEALTHY"
+
+def index_image(path):
+    """Metadata for one photo: dimensions from the header and a content hash."""
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            sha1.update(block)
+    try:
+        with Image.open(path) as img:
+            width, height = img.size
+    except Exception:
+        width = height = None
+    crop, disease = parse_asset_name(os.path.basename(path))
+    return {"crop": crop, "disease": disease, "width": width, "height": height,
+            "sha1": sha1.hexdigest(), "mtime": os.stat(path).st_mtime_ns, "size": os.stat(path).st_size}
+
+class AssetManifest:
+    """
+    On-disk catalogue of the image folders: {folder: {"mtime": ..., "files": {name: metadata}}}.
+    Each refresh re-lists the folders and stats every image (cheap), but only
+    files whose size or mtime changed are re-hashed, so an image overwritten in
+    place is picked up without rescanning the library on every start.
+    """
+    def __init__(self, folders, path=MANIFEST_FILE):
+        self.folders = folders
+        self.path = path
+        self.data = {}
+        self.dirty = False
+
+    def load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    stored = json.load(f)
+                if stored.get("version") == MANIFEST_VERSION:
+                    self.data = stored["folders"]
+            except (OSError, ValueError, KeyError):
+                self.data = {}
+        return self
+
+    def refresh(self, check_files=False):
+        """Re-indexes new and changed files (every file with check_files=True) and drops removed ones."""
+        for folder in self.folders:
+            if not os.path.isdir(folder):
+                if self.data.pop(folder, None) is not None: self.dirty = True
+                continue
+            mtime = os.stat(folder).st_mtime_ns
+            known = self.data.get(folder)
+            old_files = known["files"] if known else {}
+            files = {}
+            for name in sorted(os.listdir(folder)):
+                if not name.lower().endswith(IMAGE_EXTENSIONS): continue
+                full_path = os.path.join(folder, name)
+                stat = os.stat(full_path)
+                previous = old_files.get(name)
+                if previous and not check_files and previous["mtime"] == stat.st_mtime_ns and previous.get("size") == stat.st_size:
+                    files[name] = previous
+                else:
+                    files[name] = index_image(full_path)
+            if files != old_files or not known or known["mtime"] != mtime:
+                self.data[folder] = {"mtime": mtime, "files": files}
+                self.dirty = True
+        return self
+
+    def save(self):
+        if not self.dirty: return
+        with atomic_open(self.path) as f:
+            json.dump({"version": MANIFEST_VERSION, "folders": self.data}, f, separators=(',', ':'))
+        self.dirty = False
+
+    def images(self, folder):
+        return list(self.data.get(folder, {}).get("files", {}))
+
+    def lookup(self, folder, name):
+        return self.data.get(folder, {}).get("files", {}).get(name)
+
+def load_manifest(folders, path=MANIFEST_FILE):
+    """Loads the catalogue, re-indexing only what changed on disk, and persists any updates."""
+    manifest = AssetManifest(folders, path).load().refresh()
+    manifest.save()
+    return manifest
+
+if __name__ == "__main__":
+    # Full rebuild check: python agrotwin_assets.py "healthy crops" "unhealthy crops"
+    folders = sys.argv[1:] or ["healthy crops", "unhealthy crops"]
+    manifest = AssetManifest(folders).load().refresh(check_files=True)
+    manifest.save()
+    for folder in folders:
+        print(f"{folder}: {len(manifest.images(folder))} images")
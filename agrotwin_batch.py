@@ -0,0 +1,129 @@
+import argparse
+import contextlib
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from agrotwin_assets import describe_scan, load_manifest
+from agrotwin_chat import AgroTwinAgent, API_KEY, DEFAULT_KB, LEARNING_DB_FILE
+from agrotwin_cache import ResponseCache
+from agrotwin_fieldstate import FIELD_STATE_FILE, FieldState, HEALTHY_DIR, UNHEALTHY_DIR, open_field_state
+from agrotwin_headless import HeadlessField
+from agrotwin_llm import make_backend
+from agrotwin_store import make_learning_store
+
+# --- CONFIGURATION ---
+TREATMENT_QUESTION = (
+    "Give a treatment plan for every affected plant in this field: confirm the disease, "
+    "recommend a pesticide and an organic alternative, the dosage per acre, and when and how to apply it."
+)
+DEFAULT_CONCURRENCY = 4
+
+# --- FIELD-WIDE DIAGNOSIS ---
+def defective_cells(field):
+    """(row, col, folder, image_name) of every defective plant in a HeadlessField or a packed FieldState."""
+    if isinstance(field, FieldState):
+        for row, col in sorted(field.defective_spots()):
+            _, folder, name = field.cell(row, col)
+            yield row, col, folder, name
+    else:
+        for plant in field.plants:
+            if plant.is_defective: yield plant.row, plant.col, plant.folder_path, plant.image_name
+
+def group_defects(field, manifest):
+    """{(crop, disease, status): [(row, col), ...]} for every defective plant in the field."""
+    groups = {}
+    for row, col, folder, name in defective_cells(field):
+        crop, disease, status = describe_scan(manifest.lookup(folder, name), True)
+        groups.setdefault((crop, disease, status), []).append((row, col))
+    return groups
+
+def diagnose_field(field, concurrency=DEFAULT_CONCURRENCY, backend=None, manifest=None):
+    """
+    One expert consultation per distinct (crop, disease), at most `concurrency`
+    in flight, with each answer fanned back out to every plant in its group.
+    Model calls therefore scale with the number of diseases, not plants.
+    A packed FieldState carries no manifest, so pass one along with it.
+    """
+    groups = group_defects(field, manifest or field.manifest)
+    backend = backend or make_backend(API_KEY)
+    cache = ResponseCache(fuzzy=True)
+    store = make_learning_store(DEFAULT_KB, LEARNING_DB_FILE)
+
+    def consult(key):
+        crop, disease, status = key
+        agent = AgroTwinAgent({"crop": crop, "disease": disease, "status": status}, backend, cache, store)
+        started = time.perf_counter()
+        treatment = "".join(agent.stream_response(TREATMENT_QUESTION, learn=False))
+        return treatment, time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        answers = dict(zip(groups, pool.map(consult, groups)))
+
+    report_groups = []
+    plants = []
+    for (crop, disease, status), spots in sorted(groups.items(), key=lambda item: -len(item[1])):
+        treatment, seconds = answers[(crop, disease, status)]
+        report_groups.append({
+            "crop": crop, "disease": disease, "plants": len(spots),
+            "locations": [[row, col] for row, col in sorted(spots)],
+            "treatment": treatment, "seconds": round(seconds, 3),
+        })
+        plants += [{"row": row, "col": col, "crop": crop, "disease": disease, "group": len(report_groups) - 1} for row, col in spots]
+    return {
+        "grid_size": field.grid_size,
+        "defective_plants": len(plants),
+        # Every consultation looks the cache up once and calls the model only on a miss
+        "model_calls": cache.stats()["misses"],
+        "cache": cache.stats(),
+        "groups": report_groups,
+        "plants": sorted(plants, key=lambda p: (p["row"], p["col"])),
+    }
+
+def to_markdown(report):
+    lines = [f"# AGRO-TWIN Field Treatment Report ({report['grid_size']}x{report['grid_size']})", "",
+             f"{report['defective_plants']} defective plants, {len(report['groups'])} distinct diseases.", ""]
+    for group in report["groups"]:
+        spots = ", ".join(f"({r},{c})" for r, c in group["locations"])
+        lines += [f"## {group['crop']} - {group['disease']} ({group['plants']} plants)", "",
+                  f"Locations (row,col): {spots}", "", group["treatment"].strip(), ""]
+    return "\n".join(lines)
+
+# --- CLI ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Diagnose every defective plant in the field with one expert call per disease.")
+    parser.add_argument("--config", default="field_config.json", help="jury seeding file")
+    parser.add_argument("--field-state", default=FIELD_STATE_FILE, help="packed field to diagnose when present (see agrotwin_fieldstate.py)")
+    parser.add_argument("--grid-size", type=int, help="override the configured field size (ignores the packed field)")
+    parser.add_argument("--defect-rate", type=float, help="infect this share of cells at random instead of the jury spots (ignores the packed field)")
+    parser.add_argument("--seed", type=int, default=0, help="image assignment seed without a packed field (same as agrotwin_headless.py)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="max model requests in flight")
+    parser.add_argument("--format", choices=["json", "md"], default="json")
+    parser.add_argument("--out", help="report file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    field_state = None
+    if args.grid_size is None and args.defect_rate is None:
+        # The report may go to stdout, so the loader's warnings go to stderr
+        with contextlib.redirect_stdout(sys.stderr):
+            field_state = open_field_state(args.field_state, args.config)
+    if field_state is not None:
+        field, manifest = field_state, load_manifest([HEALTHY_DIR, UNHEALTHY_DIR])
+    else:
+        field = HeadlessField.from_config(args.config, args.grid_size, args.defect_rate, args.seed)
+        manifest = field.manifest
+    started = time.perf_counter()
+    report = diagnose_field(field, args.concurrency, manifest=manifest)
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    if field_state is not None: field_state.close()
+
+    text = json.dumps(report, indent=4) if args.format == "json" else to_markdown(report)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+    print(f"{report['defective_plants']} plants diagnosed with {report['model_calls']} model calls in {report['seconds']}s", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from agrotwin_metrics import metrics
+from agrotwin_field import SpatialGrid, SPACING, BOT_SPEED, field_origin, seed_field, scan_range_changes
+
+# --- CONFIGURATION ---
+BASELINE_FILE = "bench_baseline.json"
+DEFAULT_TOLERANCE = 0.25   # flag a metric whose p50 grows by more than 25%...
+NOISE_FLOOR = 10e-6        # ...and by more than 10 microseconds (sub-noise jitter is ignored)
+FRAME_DT = 1 / 60
+CONTEXT = {"crop": "Tomato", "disease": "Late Blight", "status": "DEFECTIVE / UNHEALTHY"}
+
+# --- BENCHMARKS ---
+# Each one drives a real hot path headlessly; the instrumentation inside the path records the timings.
+def bench_proximity(scale):
+    """sim_proximity: the sim's per-frame scan_range_changes() step, with the bot sweeping a 200x200 field."""
+    grid_size = 200
+    plants = seed_field(grid_size, set(), ("healthy", ["h.png"]), ("unhealthy", ["u.png"]), random.Random(0))
+    crop_index = SpatialGrid(field_origin(grid_size), SPACING)
+    for plant in plants:
+        crop_index.insert(plant.row, plant.col, plant)
+    highlighted = set()
+    x, z = field_origin(grid_size), field_origin(grid_size)
+    for frame in range(int(20000 * scale)):
+        x += BOT_SPEED * FRAME_DT
+        if x > -field_origin(grid_size): x, z = field_origin(grid_size), z + SPACING
+        with metrics.timed("sim_proximity"):
+            highlighted, _, _ = scan_range_changes(crop_index, x, z, highlighted)
+
+def bench_textures(scale):
+    """texture_decode / texture_load: every scan photo in the repo through a cold TextureLoader."""
+    from agrotwin_assets import Image, TextureLoader, load_manifest
+    if Image is None: return "skipped (Pillow not installed)"
+    folders = ["healthy crops", "unhealthy crops"]
+    manifest = load_manifest(folders)
+    paths = [os.path.join(folder, name) for folder in folders for name in manifest.images(folder)]
+    if not paths: return "skipped (no images)"
+    for _ in range(max(1, int(3 * scale))):
+        loader = TextureLoader(64 * 1024 * 1024)
+        for path in paths:
+            requested = time.perf_counter()
+            loader.request(path)
+            while not loader.ready(path):
+                loader.poll()
+                time.sleep(0.0005)
+            metrics.observe("texture_load", time.perf_counter() - requested)
+        loader.shutdown()
+
+def make_agent(workdir, questions=0):
+    """A chat agent on the offline stub backend with its own throwaway cache and database."""
+    from agrotwin_chat import AgroTwinAgent, DEFAULT_KB
+    from agrotwin_cache import ResponseCache
+    from agrotwin_llm import StubBackend
+    from agrotwin_store import SqliteLearningStore
+    kb = {cat: list(items) for cat, items in DEFAULT_KB.items()}
+    if questions:
+        rng = random.Random(1)
+        words = "leaf spot blight rust mildew spray dose acre soil water yield pest organic neem copper fungus root".split()
+        kb["Synthetic"] = [{"q": " ".join(rng.choice(words) for _ in range(8)) + "?", "weight": 0.1} for _ in range(questions)]
+    store = SqliteLearningStore(kb, path=os.path.join(workdir, f"bench_{questions}.db"), flush_interval=3600)
+    cache = ResponseCache(path=os.path.join(workdir, f"cache_{questions}.json"), fuzzy=True, flush_interval=3600)
+    return AgroTwinAgent(dict(CONTEXT), StubBackend(), cache, store)
+
+def bench_chat(scale):
+    """nlp_match, cache_lookup, llm_ttft / llm_latency (stub model, cache misses) and db_flush through a real AgroTwinAgent."""
+    with tempfile.TemporaryDirectory() as workdir, contextlib.redirect_stdout(io.StringIO()):
+        agent = make_agent(workdir, questions=5000)
+        known = [q_obj["q"] for questions in agent.knowledge_base.values() for q_obj in questions]
+        rng = random.Random(2)
+        for i in range(int(200 * scale)):
+            question = rng.choice(known)
+            # Unique wording each time so the response cache misses and the model path runs
+            for _ in agent.stream_response(f"{question} (field {i})"):
+                pass
+            if i % 10 == 9:
+                agent.store.flush()
+        agent.store.flush()
+        agent.store.conn.close()
+        agent.cache.flush()  # Before the workdir goes; the atexit flush would find it gone
+
+def bench_spread(scale):
+    """spread_step: one SpreadModel step on a 500x500 field."""
+    try:
+        from agrotwin_spread import SpreadModel
+    except ImportError:
+        return "skipped (NumPy not installed)"
+    model = SpreadModel(500, [(random.randrange(500), random.randrange(500)) for _ in range(50)], p_orth=0.02, seed=0)
+    for _ in range(int(300 * scale)):
+        with metrics.timed("spread_step"):
+            model.step()
+
+def bench_planner(scale):
+    """plan_route: nearest neighbour + 2-opt over 1000 defective plants."""
+    from agrotwin_planner import plan_route
+    plants = seed_field(200, set(), ("healthy", ["h.png"]), ("unhealthy", ["u.png"]), random.Random(0))
+    rng = random.Random(3)
+    for _ in range(max(1, int(5 * scale))):
+        targets = rng.sample(plants, 1000)
+        with metrics.timed("plan_route"):
+            plan_route(targets)
+
+BENCHMARKS = {
+    "proximity": bench_proximity,
+    "textures": bench_textures,
+    "chat": bench_chat,
+    "spread": bench_spread,
+    "planner": bench_planner,
+}
+
+# --- REGRESSION CHECK ---
+def check_baseline(baseline, quick):
+    """
+    A --quick run and a full one time different workloads (a tenth of the
+    iterations leaves e.g. a smaller response cache), so their numbers are not comparable.
+    """
+    if baseline.get("quick", False) != quick:
+        kind = lambda is_quick: "a --quick" if is_quick else "a full"
+        raise ValueError(f"baseline is {kind(baseline.get('quick', False))} run but this is {kind(quick)} run; "
+                         f"compare like with like or --save-baseline again")
+
+def compare(results, baseline, quick=False, tolerance=DEFAULT_TOLERANCE):
+    """
+    Metrics whose p50 regressed beyond `tolerance` (relative) and NOISE_FLOOR (absolute)
+    against a saved baseline file; refuses (ValueError) one of the other run kind.
+    """
+    check_baseline(baseline, quick)
+    regressions = []
+    for name, current in results.items():
+        before = baseline["metrics"].get(name)
+        if not before or before.get("p50") is None or current.get("p50") is None: continue
+        if current["p50"] > before["p50"] * (1 + tolerance) and current["p50"] - before["p50"] > NOISE_FLOOR:
+            regressions.append({"metric": name, "baseline_p50": before["p50"], "p50": current["p50"],
+                                "change": round(current["p50"] / before["p50"] - 1, 3)})
+    return regressions
+
+def format_row(name, summary, before=None):
+    ms = lambda value: f"{value * 1000:10.3f}" if value is not None else "       n/a"
+    row = f"{name:<16}{summary['count']:>8}{ms(summary['p50'])}{ms(summary['p95'])}{ms(summary['max'])}"
+    if before and before.get("p50"):
+        row += f"   {summary['p50'] / before['p50'] - 1:+7.1%}"
+    return row
+
+# --- CLI ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark AGRO-TWIN hot paths headlessly and flag regressions against a baseline.")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="run just these benchmarks")
+    parser.add_argument("--quick", action="store_true", help="a tenth of the iterations (smoke test)")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--out", help="also write the full results (JSON) here; the Prometheus text goes next to it")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        try:
+            check_baseline(baseline, args.quick)  # Before spending minutes on the run
+        except ValueError as e:
+            print(f"⚠️ {args.baseline}: {e}", file=sys.stderr)
+            return 2
+
+    metrics.enabled = True
+    metrics.reset()
+    scale = 0.1 if args.quick else 1.0
+    notes = {}
+    for name in args.only or BENCHMARKS:
+        started = time.perf_counter()
+        note = BENCHMARKS[name](scale)
+        notes[name] = note or f"{time.perf_counter() - started:.2f}s"
+        print(f"[BENCH] {name}: {notes[name]}", file=sys.stderr)
+    results = metrics.snapshot()
+
+    regressions = compare(results, baseline, args.quick, args.tolerance) if baseline else []
+
+    print(f"{'metric':<16}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}" + ("   vs base" if baseline else ""))
+    for name, summary in results.items():
+        print(format_row(name, summary, baseline["metrics"].get(name) if baseline else None))
+
+    if args.out:
+        metrics.export(args.out)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({"written": time.strftime("%Y-%m-%dT%H:%M:%S"), "quick": args.quick, "metrics": results}, f, indent=4)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    for regression in regressions:
+        print(f"⚠️ REGRESSION {regression['metric']}: p50 {regression['baseline_p50'] * 1000:.3f} ms -> "
+              f"{regression['p50'] * 1000:.3f} ms ({regression['change']:+.0%})")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
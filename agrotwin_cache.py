@@ -0,0 +1,139 @@
+import atexit
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from agrotwin_files import atomic_open
+from agrotwin_match import QuestionIndex
+
+# --- CONFIGURATION ---
+RESPONSE_CACHE_FILE = "agent_response_cache.json"
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_TTL = 7 * 24 * 3600  # One week: treatment advice can change between seasons
+DEFAULT_FLUSH_INTERVAL = 5.0  # seconds between a put and the write that persists it
+
+def normalise_question(text):
+    """Lowercases, drops punctuation and collapses whitespace so trivial rewordings share a key."""
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+def context_key(context):
+    return "|".join(str(context.get(k, "")).lower() for k in ("crop", "disease", "status"))
+
+# --- RESPONSE CACHE ---
+class ResponseCache:
+    """
+    Persistent answer cache keyed by scan context + normalised question.
+    Entries expire after `ttl` seconds and the least recently used ones are
+    evicted beyond `max_entries`. With `fuzzy`, an exact miss falls back to
+    the QuestionIndex of questions cached for the same context, and the best
+    one whose SequenceMatcher ratio is above `threshold` is served (a fuzzy
+    hit). New answers are written out at most once per `flush_interval`
+    (and at interpreter exit). hits/fuzzy_hits/misses are counted for
+    monitoring via stats().
+    """
+    def __init__(self, path=RESPONSE_CACHE_FILE, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL, fuzzy=False, threshold=0.8, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.fuzzy = fuzzy
+        self.threshold = threshold
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.save_lock = threading.Lock()  # an older snapshot never lands after a newer one
+        self.timer = None
+        self.dirty = False
+        self.entries = OrderedDict()  # key -> {"ctx", "q", "answer", "created"}
+        self.by_context = {}          # ctx -> QuestionIndex of its cached questions, the fuzzy search space
+        self.item_ids = {}            # key -> its id in by_context[ctx]
+        self.hits = self.fuzzy_hits = self.misses = 0
+        self.load()
+        atexit.register(self.flush)
+
+    def load(self):
+        if not os.path.exists(self.path): return
+        try:
+            with open(self.path, 'r') as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for entry in stored:
+            if now - entry["created"] < self.ttl:
+                self.insert(entry)
+
+    def mark_dirty(self):
+        """Schedules a flush; the caller holds self.lock."""
+        self.dirty = True
+        if self.timer is None:
+            self.timer = threading.Timer(self.flush_interval, self.flush)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def flush(self):
+        """Writes pending answers now (no-op if nothing changed)."""
+        with self.save_lock:
+            with self.lock:
+                if self.timer is not None:
+                    self.timer.cancel()
+                    self.timer = None
+                if not self.dirty: return
+                snapshot = list(self.entries.values())
+                self.dirty = False
+            try:
+                with atomic_open(self.path) as f:
+                    json.dump(snapshot, f)
+            except BaseException:
+                with self.lock: self.dirty = True  # The next flush retries
+                raise
+
+    def insert(self, entry):
+        key = f"{entry['ctx']}|{entry['q']}"
+        if key in self.entries: self.remove(key)
+        self.entries[key] = entry
+        self.item_ids[key] = self.by_context.setdefault(entry["ctx"], QuestionIndex()).add(entry["q"], key)
+        while len(self.entries) > self.max_entries:
+            self.remove(next(iter(self.entries)))
+
+    def remove(self, key):
+        entry = self.entries.pop(key)
+        index = self.by_context[entry["ctx"]]
+        index.remove(self.item_ids.pop(key))
+        if not index: del self.by_context[entry["ctx"]]
+
+    def get(self, context, question):
+        """Returns a cached answer for the question in this context, or None."""
+        ctx, q = context_key(context), normalise_question(question)
+        now = time.time()
+        with self.lock:
+            key = f"{ctx}|{q}"
+            if key not in self.entries and self.fuzzy and ctx in self.by_context:
+                match = self.by_context[ctx].best_match(q, self.threshold)
+                fuzzy = match is not None
+                key = match[1] if fuzzy else None
+            else:
+                fuzzy = False
+            entry = self.entries.get(key) if key else None
+            if entry is not None and now - entry["created"] >= self.ttl:
+                self.remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            if fuzzy: self.fuzzy_hits += 1
+            else: self.hits += 1
+            return entry["answer"]
+
+    def put(self, context, question, answer):
+        with self.lock:
+            self.insert({"ctx": context_key(context), "q": normalise_question(question), "answer": answer, "created": time.time()})
+            self.mark_dirty()
+
+    def stats(self):
+        lookups = self.hits + self.fuzzy_hits + self.misses
+        return {
+            "entries": len(self.entries), "hits": self.hits, "fuzzy_hits": self.fuzzy_hits, "misses": self.misses,
+            "hit_rate": (self.hits + self.fuzzy_hits) / lookups if lookups else 0.0,
+        }
@@ -1,25 +1,64 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext
-import google.generativeai as genai
 import json
 import os
 import sys
-import difflib # For NLP matching
+import queue
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener
+from agrotwin_ipc import SERVICE_ADDRESS, AUTHKEY
+from agrotwin_llm import make_backend
+from agrotwin_cache import ResponseCache
+from agrotwin_match import QuestionIndex
+from agrotwin_context import ConversationContext
+from agrotwin_store import make_learning_store
+from agrotwin_metrics import metrics
 
 # --- CONFIGURATION ---
 API_KEY = "your_api_key"
 LEARNING_DB_FILE = "agent_learning_db.json"
 SESSION_FILE = "current_session.json"
+SUGGESTION_ROW_HEIGHT = 30  # px per row in the virtualised suggestion panel
 
-# Configure Gemini
-genai.configure(api_key=API_KEY)
+# Initial questions (weights learned from here on)
+DEFAULT_KB = {
+    "1️⃣ Core Questions": [
+        {"q": "What is the problem with this crop?", "weight": 0.9},
+        {"q": "Is this a serious problem?", "weight": 0.8},
+    ],
+    "2️⃣ Pesticide Selection": [
+        {"q": "What pesticide should I use?", "weight": 0.7},
+        {"q": "Is there an organic alternative?", "weight": 0.6},
+    ],
+    "3️⃣ Dosage (Regression Model)": [
+        {"q": "What is the correct dosage per acre?", "weight": 0.5},
+        {"q": "Will using more damage the crop?", "weight": 0.5},
+    ],
+    "4️⃣ Application Method": [
+        {"q": "When is the best time to spray?", "weight": 0.5},
+        {"q": "Should I spray leaves or soil?", "weight": 0.5},
+    ]
+}
 
 # --- THE AGENT BRAIN (Regression Learning & CAG) ---
 class AgroTwinAgent:
-    def __init__(self):
-        self.context = self.load_session_context()
-        self.knowledge_base = self.load_learning_db()
-        self.conversation_history = []
+    def __init__(self, context=None, backend=None, cache=None, store=None):
+        # One backend (and so one model client) per agent, not per message
+        self.backend = backend or make_backend(API_KEY)
+        # Repeat questions about the same crop/disease are answered from disk instead of the LLM
+        self.cache = cache or ResponseCache(fuzzy=True)
+        # Learned weights live in memory; the store batches writes to disk
+        self.store = store or make_learning_store(DEFAULT_KB, LEARNING_DB_FILE)
+        self.knowledge_base = self.store.knowledge_base
+        self.question_index = self.build_question_index()
+        self.set_context(context or self.load_session_context())
+
+    def set_context(self, context):
+        """Switches the agent to a new scan (crop/disease/status) and starts a fresh conversation."""
+        self.context = context
+        self.session_id = self.store.start_session(context)
         
         # CAG: Continuous Context System Prompt
         self.system_prompt = f"""
@@ -35,6 +74,8 @@ class AgroTwinAgent:
         3. If the status is HEALTHY, advise on maintenance.
         4. If DISEASED, advise on treatment.
         """
+        # Token-budgeted history: recent turns verbatim, older ones as a rolling summary
+        self.memory = ConversationContext(self.system_prompt)
 
     def load_session_context(self):
         """Loads the disease data passed from the 3D simulation."""
@@ -43,44 +84,6 @@ class AgroTwinAgent:
                 return json.load(f)
         return {"crop": "Generic", "disease": "None", "status": "Unknown"}
 
-    def load_learning_db(self):
-        """
-        Loads the question dictionary. 
-        If it exists, load the 'learned' weights.
-        If not, initialize with default questions and weight 0.5.
-        """
-        default_kb = {
-            "1️⃣ Core Questions": [
-                {"q": "What is the problem with this crop?", "weight": 0.9},
-                {"q": "Is this a serious problem?", "weight": 0.8},
-            ],
-            "2️⃣ Pesticide Selection": [
-                {"q": "What pesticide should I use?", "weight": 0.7},
-                {"q": "Is there an organic alternative?", "weight": 0.6},
-            ],
-            "3️⃣ Dosage (Regression Model)": [
-                {"q": "What is the correct dosage per acre?", "weight": 0.5},
-                {"q": "Will using more damage the crop?", "weight": 0.5},
-            ],
-            "4️⃣ Application Method": [
-                {"q": "When is the best time to spray?", "weight": 0.5},
-                {"q": "Should I spray leaves or soil?", "weight": 0.5},
-            ]
-        }
-        
-        if os.path.exists(LEARNING_DB_FILE):
-            try:
-                with open(LEARNING_DB_FILE, 'r') as f:
-                    return json.load(f)
-            except:
-                return default_kb
-        return default_kb
-
-    def save_learning_db(self):
-        """Persists the learned weights to JSON."""
-        with open(LEARNING_DB_FILE, 'w') as f:
-            json.dump(self.knowledge_base, f, indent=4)
-
     def regression_update(self, category, question_text):
         """
         ALGORITHM: Reinforcement/Regression Update
@@ -90,61 +93,73 @@ class AgroTwinAgent:
         """
         learning_rate = 0.1
         
-        # Find the question and update weight
-        for q_obj in self.knowledge_base[category]:
-            if q_obj["q"] == question_text:
-                old_w = q_obj["weight"]
-                new_w = old_w + (learning_rate * (1.0 - old_w))
-                q_obj["weight"] = new_w
-                print(f"[AGENT LEARNING] Updated '{question_text}' weight: {old_w:.2f} -> {new_w:.2f}")
-                break
-        
-        # Re-sort the list based on new regression weights (Highest first)
-        self.knowledge_base[category].sort(key=lambda x: x['weight'], reverse=True)
-        self.save_learning_db()
+        # Update weight in memory (re-ranked highest first); the store flushes it to disk in batches
+        update = self.store.apply_update(category, question_text, learning_rate)
+        if update:
+            old_w, new_w = update
+            print(f"[AGENT LEARNING] Updated '{question_text}' weight: {old_w:.2f} -> {new_w:.2f}")
+
+    def build_question_index(self):
+        """Trigram index over every known question, so nlp_match stays fast as the KB grows."""
+        index = QuestionIndex()
+        for cat, questions in self.store.snapshot():
+            for question, _ in questions:
+                index.add(question, (cat, question))
+        return index
 
     def nlp_match(self, user_text):
         """
         Uses Sequence Matching to see if user input matches a known question.
-        If match > 80%, we trigger the learning algorithm for that question.
+        The bigram index shortlists candidates; if the best match > 80%, we trigger
+        the learning algorithm for that question.
         """
-        best_ratio = 0
-        best_cat = None
-        best_q = None
-
-        for cat, questions in self.knowledge_base.items():
-            for q_obj in questions:
-                ratio = difflib.SequenceMatcher(None, user_text.lower(), q_obj['q'].lower()).ratio()
-                if ratio > best_ratio:
-                    best_ratio = ratio
-                    best_cat = cat
-                    best_q = q_obj['q']
-        
-        if best_ratio > 0.8: # 80% confidence threshold
+        with metrics.timed("nlp_match"):
+            match = self.question_index.best_match(user_text, threshold=0.8) # 80% confidence threshold
+        if match:
+            _, (best_cat, best_q) = match
             self.regression_update(best_cat, best_q)
 
-    def generate_response(self, user_input):
-        """CAG: Combines System Context + History + New Input"""
+    def stream_response(self, user_input, learn=True):
+        """
+        CAG: Combines System Context + History + New Input, yielding the reply as it arrives.
+        Pass learn=False when the caller already ran nlp_match (e.g. on the UI thread).
+        """
         
         # 1. NLP Check (Did they ask a known question?)
-        self.nlp_match(user_input)
+        if learn: self.nlp_match(user_input)
+        # Pin the scan this reply belongs to: set_context() may switch scans while it streams
+        context, memory = self.context, self.memory
 
-        # 2. Build History String
-        history_str = "\n".join([f"User: {h[0]}\nBot: {h[1]}" for h in self.conversation_history[-3:]])
-        
-        # 3. Construct Final Prompt
-        full_prompt = f"{self.system_prompt}\n\nRecent History:\n{history_str}\n\nFarmer: {user_input}\nAGRO-TWIN:"
+        # 2. Cache Check (same context + same or near-identical question)
+        with metrics.timed("cache_lookup"):
+            cached = self.cache.get(context, user_input)
+        if cached is not None:
+            yield cached
+            memory.add_turn(user_input, cached)
+            return
+
+        # 3. Construct Final Prompt (cached system prompt + summary + recent turns, within budget)
+        full_prompt = memory.render(user_input)
         
+        parts = []
+        started = time.perf_counter()
         try:
-            model = genai.GenerativeModel('gemini-2.5-pro')
-            response = model.generate_content(full_prompt)
-            reply = response.text
-            
-            # Update History
-            self.conversation_history.append((user_input, reply))
-            return reply
+            for text in self.backend.stream(full_prompt):
+                if not parts: metrics.observe("llm_ttft", time.perf_counter() - started)
+                parts.append(text)
+                yield text
         except Exception as e:
-            return f"⚠️ Connection Error: {str(e)}"
+            yield f"⚠️ Connection Error: {str(e)}"
+            return
+        metrics.observe("llm_latency", time.perf_counter() - started)
+            
+        # Update History & Cache
+        reply = "".join(parts)
+        memory.add_turn(user_input, reply)
+        self.cache.put(context, user_input, reply)
+
+    def generate_response(self, user_input):
+        return "".join(self.stream_response(user_input))
 
 # --- GUI IMPLEMENTATION ---
 class ChatbotGUI:
@@ -156,17 +171,26 @@ class ChatbotGUI:
         self.root.geometry("900x700")
         self.root.configure(bg="#1a1a1a")
 
+        # Generation runs on a worker thread; the Tk thread only drains its events
+        self.requests = queue.Queue()
+        self.events = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.queued = 0
+        self.latency_text = "Ready"
+
         self.create_layout()
+        threading.Thread(target=self.generation_worker, daemon=True).start()
+        self.drain_events()
 
     def create_layout(self):
         # 1. Header
-        header = tk.Label(
+        self.header = tk.Label(
             self.root, 
             text=f"DETECTED: {self.agent.context['disease'].upper()}", 
             bg="#d9534f" if "DEFECTIVE" in self.agent.context['status'] else "#5cb85c",
             fg="white", font=("Arial", 14, "bold"), pady=10
         )
-        header.pack(fill="x")
+        self.header.pack(fill="x")
 
         # 2. Main Container (Split Left/Right)
         main_frame = tk.Frame(self.root, bg="#1a1a1a")
@@ -180,7 +204,7 @@ class ChatbotGUI:
             chat_frame, bg="#2b2b2b", fg="white", font=("Segoe UI", 11), wrap="word"
         )
         self.chat_display.pack(fill="both", expand=True, pady=(0, 10))
-        self.chat_display.insert(tk.END, "AGRO-TWIN: Hello! I have analyzed the crop. Select a question on the right or type your own.\n\n")
+        self.greet()
 
         input_frame = tk.Frame(chat_frame, bg="#1a1a1a")
         input_frame.pack(fill="x")
@@ -192,59 +216,112 @@ class ChatbotGUI:
         send_btn = tk.Button(input_frame, text="SEND", command=self.handle_send, bg="#007acc", fg="white", font=("Arial", 10, "bold"))
         send_btn.pack(side="right")
 
+        cancel_btn = tk.Button(input_frame, text="CANCEL", command=self.cancel_current, bg="#555", fg="white", font=("Arial", 10, "bold"))
+        cancel_btn.pack(side="right", padx=(0, 5))
+
+        self.status_label = tk.Label(chat_frame, text="Ready", bg="#1a1a1a", fg="#888", font=("Arial", 9), anchor="w")
+        self.status_label.pack(fill="x", pady=(5, 0))
+
         # --- RIGHT: INTELLIGENT SUGGESTIONS (The Agent's Knowledge) ---
         suggestion_frame = tk.Frame(main_frame, bg="#222", width=300)
         suggestion_frame.pack(side="right", fill="y", padx=(10, 0))
         
         tk.Label(suggestion_frame, text="RECOMMENDED QUESTIONS", bg="#222", fg="#aaa", font=("Arial", 10, "bold")).pack(pady=5)
         
-        # Scrollable Canvas for buttons
-        canvas = tk.Canvas(suggestion_frame, bg="#222", highlightthickness=0)
-        scrollbar = ttk.Scrollbar(suggestion_frame, orient="vertical", command=canvas.yview)
-        self.scrollable_frame = tk.Frame(canvas, bg="#222")
-
-        self.scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
-        canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
+        # Virtualised list: only the rows in view own a widget, recycled as the list scrolls
+        self.suggestion_canvas = tk.Canvas(suggestion_frame, bg="#222", highlightthickness=0, width=280)
+        self.suggestion_scrollbar = ttk.Scrollbar(suggestion_frame, orient="vertical", command=self.suggestion_canvas.yview)
+        self.suggestion_canvas.configure(yscrollcommand=self.on_suggestion_scroll)
+        self.suggestion_canvas.bind("<Configure>", lambda e: self.render_suggestions(resized=True))
+
+        self.suggestion_canvas.pack(side="left", fill="both", expand=True)
+        self.suggestion_scrollbar.pack(side="right", fill="y")
 
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+        self.suggestion_rows = []   # flattened ("header", category) / ("question", category, text, weight)
+        self.suggestion_slots = {}  # row index -> [button, canvas window id, rendered content]
+        self.spare_slots = []
 
         self.refresh_suggestions()
 
+    def greet(self):
+        self.chat_display.insert(tk.END, "AGRO-TWIN: Hello! I have analyzed the crop. Select a question on the right or type your own.\n\n")
+
+    def load_context(self, context):
+        """Points the open window at a new scan sent by the simulator."""
+        self.clear_queue()
+        self.agent.set_context(context)
+        self.root.title(f"AGRO-TWIN EXPERT | Analyzing: {context['crop']}")
+        self.header.config(
+            text=f"DETECTED: {context['disease'].upper()}",
+            bg="#d9534f" if "DEFECTIVE" in context['status'] else "#5cb85c"
+        )
+        self.chat_display.delete("1.0", tk.END)
+        self.greet()
+
     def refresh_suggestions(self):
-        """Redraws the buttons. Because of Regression Learning, the order changes dynamically."""
-        # Clear old buttons
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
+        """
+        Re-ranks the panel. Because of Regression Learning, the order changes dynamically;
+        only visible rows whose text or colour actually changed are repainted.
+        """
+        self.suggestion_rows = []
+        # A snapshot: the store's timed flush may reload the weights on its own thread meanwhile
+        for category, questions in self.agent.store.snapshot():
+            self.suggestion_rows.append(("header", category))
+            # Questions (Sorted by weight in agent class)
+            for question, weight in questions:
+                self.suggestion_rows.append(("question", category, question, weight))
+        height = len(self.suggestion_rows) * SUGGESTION_ROW_HEIGHT
+        self.suggestion_canvas.configure(scrollregion=(0, 0, 0, height))
+        self.render_suggestions()
+
+    def on_suggestion_scroll(self, first, last):
+        self.suggestion_scrollbar.set(first, last)
+        self.render_suggestions()
+
+    def render_suggestions(self, resized=False):
+        """Binds recycled row widgets to whatever rows are currently inside the viewport."""
+        canvas = self.suggestion_canvas
+        top = int(canvas.canvasy(0)) // SUGGESTION_ROW_HEIGHT
+        visible = range(max(top - 1, 0), min(top + canvas.winfo_height() // SUGGESTION_ROW_HEIGHT + 2, len(self.suggestion_rows)))
 
-        # Create new buttons based on current Knowledge Base weights
-        for category, questions in self.agent.knowledge_base.items():
+        for index in [i for i in self.suggestion_slots if i not in visible]:
+            slot = self.suggestion_slots.pop(index)
+            canvas.itemconfigure(slot[1], state="hidden")
+            self.spare_slots.append(slot)
+
+        width = max(canvas.winfo_width(), 1)
+        for index in visible:
+            slot = self.suggestion_slots.get(index)
+            if slot is None:
+                slot = self.spare_slots.pop() if self.spare_slots else self.make_suggestion_slot()
+                canvas.coords(slot[1], 0, index * SUGGESTION_ROW_HEIGHT)
+                canvas.itemconfigure(slot[1], state="normal", width=width)
+                self.suggestion_slots[index] = slot
+            elif resized:
+                canvas.itemconfigure(slot[1], width=width)
+            row = self.suggestion_rows[index]
+            if slot[2] != row:
+                self.paint_suggestion(slot[0], row)
+                slot[2] = row
+
+    def make_suggestion_slot(self):
+        btn = tk.Button(self.suggestion_canvas, anchor="w", justify="left", fg="white", bd=0, padx=10, pady=5)
+        window = self.suggestion_canvas.create_window(0, 0, window=btn, anchor="nw", height=SUGGESTION_ROW_HEIGHT - 2)
+        return [btn, window, None]
+
+    def paint_suggestion(self, btn, row):
+        if row[0] == "header":
             # Category Header
-            tk.Label(self.scrollable_frame, text=category, bg="#222", fg="#00aaff", font=("Arial", 9, "bold"), anchor="w").pack(fill="x", pady=(10, 2))
-            
-            # Questions (Sorted by weight in agent class)
-            for q_data in questions:
-                q_text = q_data['q']
-                weight = q_data['weight']
-                
-                # Visual cue for highly learned questions
-                bg_color = "#333"
-                if weight > 0.8: bg_color = "#445500" # Golden tint for popular questions
-                
-                btn = tk.Button(
-                    self.scrollable_frame, 
-                    text=f"{q_text}", 
-                    anchor="w", justify="left",
-                    bg=bg_color, fg="white", 
-                    font=("Arial", 9),
-                    bd=0, padx=10, pady=5,
-                    command=lambda q=q_text, c=category: self.handle_suggestion_click(c, q)
-                )
-                btn.pack(fill="x", pady=1)
+            btn.config(text=row[1], bg="#222", fg="#00aaff", activebackground="#222", font=("Arial", 9, "bold"), command="")
+            return
+        _, category, q_text, weight = row
+        # Visual cue for highly learned questions
+        bg_color = "#333"
+        if weight > 0.8: bg_color = "#445500" # Golden tint for popular questions
+        btn.config(
+            text=f"{q_text}", bg=bg_color, fg="white", activebackground=bg_color, font=("Arial", 9),
+            command=lambda q=q_text, c=category: self.handle_suggestion_click(c, q)
+        )
 
     def handle_suggestion_click(self, category, question):
         """User clicked a preset."""
@@ -252,8 +329,8 @@ class ChatbotGUI:
         self.agent.regression_update(category, question)
         # 2. Refresh UI (to show new sorting)
         self.refresh_suggestions()
-        # 3. Process Chat
-        self.process_query(question)
+        # 3. Process Chat (already learned from above, so skip the NLP match)
+        self.process_query(question, learn=False)
 
     def handle_send(self, event=None):
         """User typed manually."""
@@ -262,20 +339,160 @@ class ChatbotGUI:
             self.process_query(query)
             self.entry.delete(0, tk.END)
 
-    def process_query(self, query):
-        # Display User Msg
-        self.chat_display.insert(tk.END, f"\nFarmer: {query}\n", "user")
-        self.chat_display.see(tk.END)
-        
-        # Get AI Response (Non-blocking usually, but simple here)
-        self.root.update() # Force UI update before API call
-        response = self.agent.generate_response(query)
-        
-        # Display AI Msg
-        self.chat_display.insert(tk.END, f"AGRO-TWIN: {response}\n", "bot")
-        self.chat_display.see(tk.END)
+    def process_query(self, query, learn=True):
+        # Learning update stays on the Tk thread; the model call is queued for the worker
+        if learn: self.agent.nlp_match(query)
+        self.queued += 1
+        self.requests.put(query)
+        self.update_status()
 
-if __name__ == "__main__":
+    def cancel_current(self):
+        """Stops the answer being streamed right now; queued questions still run."""
+        self.cancel_event.set()
+
+    def clear_queue(self):
+        while True:
+            try:
+                self.requests.get_nowait()
+            except queue.Empty:
+                break
+            self.queued -= 1
+        self.cancel_event.set()
+        self.update_status()
+
+    def generation_worker(self):
+        """Runs one query at a time and reports progress to the Tk thread through self.events."""
+        while True:
+            query = self.requests.get()
+            self.cancel_event.clear()
+            self.events.put(("start", query))
+            started = time.perf_counter()
+            first_token = None
+            stream = self.agent.stream_response(query, learn=False)
+            try:
+                for text in stream:
+                    if self.cancel_event.is_set(): break
+                    if first_token is None:
+                        first_token = time.perf_counter() - started
+                        self.events.put(("first_token", first_token))
+                    self.events.put(("chunk", text))
+            finally:
+                stream.close()
+            self.events.put(("end", self.cancel_event.is_set(), first_token, time.perf_counter() - started))
+
+    def drain_events(self):
+        while not self.events.empty():
+            kind, *payload = self.events.get()
+            if kind == "start":
+                self.queued -= 1
+                self.chat_display.insert(tk.END, f"\nFarmer: {payload[0]}\n", "user")
+                self.chat_display.insert(tk.END, "AGRO-TWIN: ", "bot")
+                self.latency_text = "Thinking..."
+            elif kind == "first_token":
+                self.latency_text = f"Time to first token: {payload[0]:.2f}s"
+            elif kind == "chunk":
+                self.chat_display.insert(tk.END, payload[0], "bot")
+            elif kind == "end":
+                cancelled, first_token, total = payload
+                self.chat_display.insert(tk.END, " [cancelled]\n" if cancelled else "\n", "bot")
+                ttft = f"{first_token:.2f}s" if first_token is not None else "n/a"
+                self.latency_text = f"Time to first token: {ttft} | Total: {total:.2f}s" + (" (cancelled)" if cancelled else "")
+                self.latency_text += f" | Cache hit rate: {self.agent.cache.stats()['hit_rate']:.0%}"
+            self.chat_display.see(tk.END)
+            self.update_status()
+        self.root.after(30, self.drain_events)
+
+    def update_status(self):
+        queued = f" | Queued: {self.queued}" if self.queued > 0 else ""
+        self.status_label.config(text=self.latency_text + queued)
+
+# --- CHAT SERVICE (long-lived, driven by the simulator over IPC) ---
+class ChatService:
+    """
+    Keeps the chat window and agent warm in one process so the simulator can
+    consult it without paying interpreter/Tk/Gemini startup per scan.
+    Connections are served on background threads; anything that touches Tk
+    is queued and applied on the Tk thread by poll(). Only the simulator that
+    spawned the service knows its key, so the service lives while that
+    simulator stays connected: once the last client hangs up (or none shows
+    up within CONNECT_TIMEOUT) it saves and exits, freeing the port.
+    """
+    CONNECT_TIMEOUT = 60.0
+
+    def __init__(self, gui, address=SERVICE_ADDRESS, authkey=AUTHKEY):
+        self.gui = gui
+        self.listener = Listener(address, authkey=authkey)
+        self.ui_queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.clients = 0
+        self.served = False
+        self.orphaned = threading.Event()
+        self.started = time.monotonic()
+
+    def start(self):
+        threading.Thread(target=self.accept_loop, daemon=True).start()
+        self.poll()
+
+    def accept_loop(self):
+        while True:
+            try:
+                conn = self.listener.accept()
+            except (OSError, EOFError, AuthenticationError):
+                continue  # A client failed the handshake (e.g. wrong key); keep serving the others
+            threading.Thread(target=self.serve_connection, args=(conn,), daemon=True).start()
+
+    def serve_connection(self, conn):
+        agent = None  # Each client gets its own conversation for "ask"
+        with self.lock:
+            self.clients += 1
+            self.served = True
+        try:
+            while True:
+                message = conn.recv()
+                op = message.get("op")
+                if op == "ping":
+                    conn.send({"op": "pong"})
+                elif op == "consult":
+                    self.ui_queue.put(message["context"])
+                    conn.send({"op": "ok"})
+                elif op == "ask":
+                    if agent is None: agent = AgroTwinAgent(message.get("context"), self.gui.agent.backend, self.gui.agent.cache, self.gui.agent.store)
+                    elif message.get("context"): agent.set_context(message["context"])
+                    for text in agent.stream_response(message["question"]):
+                        conn.send({"op": "chunk", "text": text})
+                    conn.send({"op": "done"})
+                else:
+                    conn.send({"op": "error", "error": f"unknown op {op!r}"})
+        except (EOFError, OSError):
+            conn.close()
+        finally:
+            with self.lock:
+                self.clients -= 1
+                if not self.clients: self.orphaned.set()
+
+    def poll(self):
+        if self.orphaned.is_set() or (not self.served and time.monotonic() - self.started > self.CONNECT_TIMEOUT):
+            # The simulator hung up (it exited or crashed): save the weights and answers and free the port
+            self.gui.agent.store.flush()
+            self.gui.agent.cache.flush()
+            self.listener.close()
+            self.gui.root.destroy()
+            return
+        while not self.ui_queue.empty():
+            self.gui.load_context(self.ui_queue.get())
+            self.gui.root.deiconify()
+            self.gui.root.lift()
+        self.gui.root.after(50, self.poll)
+
+def main():
     root = tk.Tk()
     app = ChatbotGUI(root)
-    root.mainloop()
\ No newline at end of file
+    if "--serve" in sys.argv:
+        # Service mode: stay hidden until the simulator sends a scan; closing only hides the window
+        root.withdraw()
+        root.protocol("WM_DELETE_WINDOW", lambda: (app.agent.store.flush(), app.agent.cache.flush(), root.withdraw()))
+        ChatService(app).start()
+    root.mainloop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import re
+from collections import deque
+
+# --- CONFIGURATION ---
+HISTORY_TOKEN_BUDGET = 1200  # verbatim recent turns
+SUMMARY_TOKEN_BUDGET = 300   # rolling digest of older turns
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token), good enough for budgeting prompts."""
+    return len(text) // 4 + 1
+
+def clip(text, limit):
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + "..."
+
+def summarise_turn(question, answer):
+    """One-line digest of a turn: the question plus the first sentence of the answer."""
+    first_sentence = re.split(r"(?<=[.!?])\s", " ".join(answer.split()), maxsplit=1)[0]
+    return f"- Farmer asked: {clip(question, 80)} -> {clip(first_sentence, 140)}"
+
+# --- TOKEN-BUDGETED CONVERSATION CONTEXT ---
+class ConversationContext:
+    """
+    Bounded prompt memory for one consultation.
+    Recent turns are kept verbatim up to `history_budget` tokens; turns pushed
+    out are folded into one-line summaries, themselves capped at
+    `summary_budget` tokens (oldest dropped first). The system prompt and the
+    rendered history are cached, so building a prompt is one concatenation
+    and its size never exceeds prefix + both budgets + the new question.
+    """
+    def __init__(self, system_prompt, history_budget=HISTORY_TOKEN_BUDGET, summary_budget=SUMMARY_TOKEN_BUDGET):
+        self.prefix = system_prompt
+        self.history_budget = history_budget
+        self.summary_budget = summary_budget
+        self.turns = deque()      # (question, answer, tokens)
+        self.turn_tokens = 0
+        self.summaries = deque()  # (line, tokens)
+        self.summary_tokens = 0
+        self.head = None          # cached prompt up to (not including) the new question
+
+    def __len__(self):
+        return len(self.turns)
+
+    def add_turn(self, question, answer):
+        entry = f"User: {question}\nBot: {answer}"
+        tokens = estimate_tokens(entry)
+        self.turns.append((question, answer, tokens))
+        self.turn_tokens += tokens
+        # Always keep the latest turn verbatim, even if it alone is over budget
+        while self.turn_tokens > self.history_budget and len(self.turns) > 1:
+            old_q, old_a, old_tokens = self.turns.popleft()
+            self.turn_tokens -= old_tokens
+            line = summarise_turn(old_q, old_a)
+            self.summaries.append((line, estimate_tokens(line)))
+            self.summary_tokens += self.summaries[-1][1]
+        while self.summary_tokens > self.summary_budget and self.summaries:
+            self.summary_tokens -= self.summaries.popleft()[1]
+        self.head = None
+
+    def render(self, user_input):
+        """Full prompt for the next question."""
+        if self.head is None:
+            parts = [self.prefix]
+            if self.summaries:
+                parts.append("Earlier in this consultation:\n" + "\n".join(line for line, _ in self.summaries))
+            history_str = "\n".join(f"User: {q}\nBot: {a}" for q, a, _ in self.turns)
+            parts.append(f"Recent History:\n{history_str}")
+            self.head = "\n\n".join(parts)
+        return f"{self.head}\n\nFarmer: {user_input}\nAGRO-TWIN:"
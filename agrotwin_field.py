@@ -0,0 +1,278 @@
+import json
+import math
+import os
+import random
+from agrotwin_assets import describe_scan
+from agrotwin_files import atomic_open
+
+# --- 1. SPATIAL INDEX ---
+class SpatialGrid:
+    """
+    Uniform grid index over the crop layout.
+    Plants sit on a regular lattice (start_offset + index * spacing), so a world
+    position maps straight to a (row, col) cell and a proximity query only has
+    to look at the handful of cells around it instead of the whole field.
+    """
+    def __init__(self, start_offset, spacing):
+        self.start_offset = start_offset
+        self.spacing = spacing
+        self.cells = {}
+
+    def cell_of(self, x, z):
+        """Returns the (row, col) cell nearest to a world position."""
+        return (round((z - self.start_offset) / self.spacing), round((x - self.start_offset) / self.spacing))
+
+    def insert(self, row, col, item):
+        self.cells[(row, col)] = item
+
+    def in_box(self, x_min, z_min, x_max, z_max):
+        """Yields every item whose cell centre lies inside the world-space box."""
+        row_min, col_min = self.cell_of(x_min, z_min)
+        row_max, col_max = self.cell_of(x_max, z_max)
+        for row in range(row_min, row_max + 1):
+            for col in range(col_min, col_max + 1):
+                item = self.cells.get((row, col))
+                if item is not None:
+                    yield item
+
+    def nearby(self, x, z, radius):
+        """Yields every item whose cell could lie within `radius` of (x, z)."""
+        reach = math.ceil(radius / self.spacing)
+        center_row, center_col = self.cell_of(x, z)
+        for row in range(center_row - reach, center_row + reach + 1):
+            for col in range(center_col - reach, center_col + reach + 1):
+                item = self.cells.get((row, col))
+                if item is not None:
+                    yield item
+
+# --- 2. FIELD LAYOUT & SEEDING ---
+CONFIG_FILE = "field_config.json"
+SPACING = 10
+CHUNK_SIZE = 16
+
+def load_jury_config(path=CONFIG_FILE):
+    """Returns (grid_size, defective_spots) from the jury seeding file (run-length or per-spot format)."""
+    if not os.path.exists(path): return 10, set()
+    with open(path, 'r') as f:
+        data = json.load(f)
+    if 'defective_runs' in data:
+        return data.get('grid_size', 10), decode_runs(data['defective_runs'])
+    return data.get('grid_size', 10), {(item['row'], item['col']) for item in data['defective_spots']}
+
+def save_jury_config(grid_size, defective_spots, path=CONFIG_FILE):
+    """Writes the seeding file as row-wise runs, which stays small even for 500x500 fields."""
+    data = {"grid_size": grid_size, "defective_runs": encode_runs(defective_spots)}
+    with atomic_open(path) as f:
+        json.dump(data, f, separators=(',', ':'))
+
+def encode_runs(spots):
+    """{(row, col)} -> [[row, first_col, length], ...] covering each horizontal stretch of spots."""
+    runs = []
+    for row, col in sorted(spots):
+        if runs and runs[-1][0] == row and runs[-1][1] + runs[-1][2] == col:
+            runs[-1][2] += 1
+        else:
+            runs.append([row, col, 1])
+    return runs
+
+def decode_runs(runs):
+    return {(row, col) for row, first_col, length in runs for col in range(first_col, first_col + length)}
+
+# --- Procedural infection patterns (all return a set of (row, col)) ---
+def random_pattern(grid_size, density, rng=random):
+    """Infects round(density * cells) spots chosen uniformly."""
+    cells = grid_size * grid_size
+    picks = rng.sample(range(cells), min(cells, round(density * cells)))
+    return {divmod(index, grid_size) for index in picks}
+
+def cluster_pattern(grid_size, clusters, radius, rng=random, fill=0.8):
+    """Blotches around random centres; infection odds fall off linearly with distance from each centre."""
+    spots = set()
+    for _ in range(clusters):
+        center_row, center_col = rng.randrange(grid_size), rng.randrange(grid_size)
+        reach = math.ceil(radius)
+        for row in range(max(0, center_row - reach), min(grid_size, center_row + reach + 1)):
+            for col in range(max(0, center_col - reach), min(grid_size, center_col + reach + 1)):
+                distance = math.hypot(row - center_row, col - center_col)
+                if distance <= radius and rng.random() < fill * (1.0 - distance / (radius + 1)):
+                    spots.add((row, col))
+    return spots
+
+def spread_pattern(grid_size, seeds, steps, probability, rng=random):
+    """Outbreak grown from `seeds` random plants: each step, every new case infects each 4-neighbour with `probability`."""
+    spots = {(rng.randrange(grid_size), rng.randrange(grid_size)) for _ in range(seeds)}
+    frontier = list(spots)
+    for _ in range(steps):
+        fresh = []
+        for row, col in frontier:
+            for n_row, n_col in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)):
+                if 0 <= n_row < grid_size and 0 <= n_col < grid_size and (n_row, n_col) not in spots and rng.random() < probability:
+                    spots.add((n_row, n_col))
+                    fresh.append((n_row, n_col))
+        frontier = fresh
+    return spots
+
+PATTERNS = {"random": random_pattern, "clusters": cluster_pattern, "spread": spread_pattern}
+
+def field_origin(grid_size, spacing=SPACING):
+    """Offset of row/col 0 so the field stays centred on the world origin (10x10 -> -45)."""
+    return -(grid_size - 1) * spacing / 2
+
+class Plant:
+    """Lightweight record for one crop; the renderer decides how (or if) it is drawn."""
+    __slots__ = ('row', 'col', 'x', 'z', 'is_defective', 'image_name', 'folder_path', 'entity')
+
+    def __init__(self, row, col, x, z, is_defective, image_name, folder_path):
+        self.row = row; self.col = col
+        self.x = x; self.z = z
+        self.is_defective = is_defective
+        self.image_name = image_name
+        self.folder_path = folder_path
+        self.entity = None
+
+    @property
+    def grid_coords(self):
+        return (self.row, self.col)
+
+def seed_field(grid_size, defective_spots, healthy, unhealthy, rng=random, rows=None):
+    """
+    Builds the plant records for a grid_size x grid_size field (or just `rows` of it).
+    `healthy`/`unhealthy` are (folder, image_list) pairs; defective spots draw from the latter.
+    """
+    start_offset = field_origin(grid_size)
+    healthy_dir, healthy_images = healthy
+    unhealthy_dir, unhealthy_images = unhealthy
+    plants = []
+    for row in (rows if rows is not None else range(grid_size)):
+        z_pos = start_offset + (row * SPACING)
+        for col in range(grid_size):
+            x_pos = start_offset + (col * SPACING)
+            if (row, col) in defective_spots:
+                plant = Plant(row, col, x_pos, z_pos, True, rng.choice(unhealthy_images), unhealthy_dir)
+            else:
+                plant = Plant(row, col, x_pos, z_pos, False, rng.choice(healthy_images), healthy_dir)
+            plants.append(plant)
+    return plants
+
+def group_by_chunk(plants, chunk_size=CHUNK_SIZE):
+    """Buckets plants into square blocks of the grid: {(chunk_row, chunk_col): [plants]}."""
+    chunks = {}
+    for plant in plants:
+        chunks.setdefault((plant.row // chunk_size, plant.col // chunk_size), []).append(plant)
+    return chunks
+
+# --- 3. BOT RULES ---
+BOT_SPEED = 20     # world units per second for each held movement key
+BOT_HEIGHT = 1     # the bot hovers one unit above the plant origins
+SCAN_RADIUS = 5.0  # 3D distance at which a plant highlights and can be scanned
+
+def in_scan_range(plant, x, z):
+    return (plant.x - x) ** 2 + (plant.z - z) ** 2 + BOT_HEIGHT ** 2 < SCAN_RADIUS ** 2
+
+def scan_range_changes(grid, x, z, highlighted):
+    """
+    The per-frame proximity step: plants in scan range of (x, z), plus those that
+    left and entered it since `highlighted` (the previous frame's set), i.e. the
+    only ones whose highlight has to change.
+    """
+    in_range = {plant for plant in grid.nearby(x, z, SCAN_RADIUS) if in_scan_range(plant, x, z)}
+    return in_range, highlighted - in_range, in_range - highlighted
+
+def build_scan_report(plant, x, z, manifest):
+    """The report shown for a scan of `plant` taken from bot position (x, z)."""
+    crop_name, disease_name, status_str = describe_scan(manifest.lookup(plant.folder_path, plant.image_name), plant.is_defective)
+    return {
+        "location": f"X:{int(x)} | Z:{int(z)}",
+        "status": status_str, "crop": crop_name, "disease": disease_name,
+    }
+
+# --- 4. CHUNK STREAMING ---
+class ChunkManager:
+    """
+    Level-of-detail bookkeeping for the field, keyed on (chunk_row, chunk_col).
+    Chunks within `detail_radius` of the bot's chunk are loaded at full detail,
+    those within `impostor_radius` get a cheap stand-in and the rest are unloaded,
+    so live geometry depends on view distance rather than on field area.
+    The actual scene objects come from the `load_detail` / `load_impostor` callbacks
+    and are handed back to `unload` when a chunk changes level.
+    """
+    def __init__(self, chunks, grid, chunk_size, load_detail, load_impostor, unload, detail_radius=1, impostor_radius=3):
+        self.chunks = chunks
+        self.grid = grid
+        self.chunk_size = chunk_size
+        self.load_detail = load_detail
+        self.load_impostor = load_impostor
+        self.unload = unload
+        self.detail_radius = detail_radius
+        self.impostor_radius = impostor_radius
+        self.active = {}  # key -> (level, handle)
+        self.center = None
+
+    def level_for(self, key, center):
+        reach = max(abs(key[0] - center[0]), abs(key[1] - center[1]))
+        if reach <= self.detail_radius: return 'detail'
+        if reach <= self.impostor_radius: return 'impostor'
+        return None
+
+    def update(self, x, z):
+        """Re-levels chunks around the bot; does nothing until it crosses a chunk border."""
+        row, col = self.grid.cell_of(x, z)
+        center = (row // self.chunk_size, col // self.chunk_size)
+        if center == self.center: return
+        self.center = center
+
+        wanted = {}
+        r = self.impostor_radius
+        for chunk_row in range(center[0] - r, center[0] + r + 1):
+            for chunk_col in range(center[1] - r, center[1] + r + 1):
+                key = (chunk_row, chunk_col)
+                if key in self.chunks:
+                    wanted[key] = self.level_for(key, center)
+
+        for key in [k for k in self.active if k not in wanted]:
+            self.unload(self.active.pop(key)[1])
+        for key, level in wanted.items():
+            current = self.active.get(key)
+            if current and current[0] == level: continue
+            if current: self.unload(current[1])
+            loader = self.load_detail if level == 'detail' else self.load_impostor
+            self.active[key] = (level, loader(key, self.chunks[key]))
+
+# --- 5. BATCHED PLANT GEOMETRY ---
+def box_triangles(cy, sx, sy, sz):
+    """Flat triangle list for an axis-aligned box centred at (0, cy, 0)."""
+    hx, hy, hz = sx / 2, sy / 2, sz / 2
+    c = [(x, cy + y, z) for x in (-hx, hx) for y in (-hy, hy) for z in (-hz, hz)]
+    faces = ((0, 1, 3, 2), (4, 6, 7, 5), (0, 4, 5, 1), (2, 3, 7, 6), (0, 2, 6, 4), (1, 5, 7, 3))
+    tris = []
+    for a, b, d, e in faces:
+        tris += [c[a], c[b], c[d], c[a], c[d], c[e]]
+    return tris
+
+def ellipsoid_triangles(cy, rx, ry, rz, segments=8, rings=4):
+    """Flat triangle list for a low-poly ellipsoid centred at (0, cy, 0)."""
+    def point(ring, seg):
+        theta = math.pi * ring / rings
+        phi = 2 * math.pi * seg / segments
+        return (rx * math.sin(theta) * math.cos(phi), cy + ry * math.cos(theta), rz * math.sin(theta) * math.sin(phi))
+    tris = []
+    for ring in range(rings):
+        for seg in range(segments):
+            a, b = point(ring, seg), point(ring, seg + 1)
+            d, e = point(ring + 1, seg), point(ring + 1, seg + 1)
+            if ring > 0: tris += [a, e, b]
+            if ring < rings - 1: tris += [a, d, e]
+    return tris
+
+# Same proportions as the original cube(1,3,1) stalk with its sphere(1.5) foliage on top
+STALK_TRIANGLES = box_triangles(0, 1, 3, 1)
+FOLIAGE_TRIANGLES = ellipsoid_triangles(1.5, 0.75, 0.75, 0.75)
+
+def batch_vertices(plants):
+    """Merges stalk + foliage geometry of many plants into one vertex list (one draw call)."""
+    template = STALK_TRIANGLES + FOLIAGE_TRIANGLES
+    vertices = []
+    for plant in plants:
+        px, pz = plant.x, plant.z
+        vertices += [(px + x, y, pz + z) for x, y, z in template]
+    return vertices
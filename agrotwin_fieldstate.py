@@ -0,0 +1,229 @@
+import argparse
+import json
+import mmap
+import os
+import random
+import struct
+import sys
+from array import array
+from agrotwin_assets import load_manifest
+from agrotwin_files import atomic_open
+from agrotwin_field import CONFIG_FILE, CHUNK_SIZE, SPACING, Plant, field_origin, load_jury_config
+
+try:
+    import numpy as np
+except ImportError:  # Falls back to plain memoryviews over the mapping
+    np = None
+
+# --- CONFIGURATION ---
+HEALTHY_DIR = "healthy crops"
+UNHEALTHY_DIR = "unhealthy crops"
+FIELD_STATE_FILE = "field_state.agtf"
+
+# File layout (little endian):
+#   header  | state: grid_size^2 x uint8 | pad to 2 bytes | image: grid_size^2 x uint16 | image table (JSON)
+# state holds HEALTHY/DEFECTIVE per cell, image indexes the table's [folder, name] pairs; both row-major.
+MAGIC = b"AGTF"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIQQQQ")  # magic, version, reserved, grid_size, state/image/table offsets, table length
+HEALTHY, DEFECTIVE = 0, 1
+
+# --- WRITER ---
+def write_field_state(path, grid_size, defective_spots, healthy, unhealthy, seed=0):
+    """
+    Packs a field into the binary format, one row at a time.
+    Images are drawn exactly like HeadlessField (one seeded RNG stream per
+    row), so the packed field matches `agrotwin_headless.py --seed` runs.
+    """
+    healthy_dir, healthy_images = healthy
+    unhealthy_dir, unhealthy_images = unhealthy
+    table = [[healthy_dir, name] for name in healthy_images] + [[unhealthy_dir, name] for name in unhealthy_images]
+    if len(table) > 0xFFFF: raise ValueError("image table exceeds 65535 entries")
+    healthy_ids = list(range(len(healthy_images)))
+    unhealthy_ids = list(range(len(healthy_images), len(table)))
+
+    cells = grid_size * grid_size
+    state_offset = HEADER.size
+    image_offset = state_offset + cells + (state_offset + cells) % 2
+    table_offset = image_offset + 2 * cells
+    table_bytes = json.dumps(table).encode("utf-8")
+
+    with atomic_open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, grid_size, state_offset, image_offset, table_offset, len(table_bytes)))
+        f.truncate(table_offset)  # zero-filled; each row is then written straight to its place
+        for row in range(grid_size):
+            rng = random.Random(seed * 1000003 + row)
+            state_row = bytearray(grid_size)
+            image_row = array('H', bytes(2 * grid_size))
+            for col in range(grid_size):
+                if (row, col) in defective_spots:
+                    state_row[col] = DEFECTIVE
+                    image_row[col] = rng.choice(unhealthy_ids)
+                else:
+                    image_row[col] = rng.choice(healthy_ids)
+            if sys.byteorder == "big": image_row.byteswap()
+            f.seek(state_offset + row * grid_size)
+            f.write(state_row)
+            f.seek(image_offset + row * 2 * grid_size)
+            f.write(image_row.tobytes())
+        f.seek(table_offset)
+        f.write(table_bytes)
+
+# --- READER ---
+class FieldState:
+    """
+    Memory-mapped view of a packed field. Opening it reads only the header
+    and image table; cell data is paged in by the OS as rows are touched, so
+    a multi-million-cell field costs almost nothing until it is used. With
+    NumPy, `state` and `image` are (grid_size, grid_size) arrays over the
+    mapping; without it they are flat memoryviews indexed row * grid_size + col.
+    """
+    def __init__(self, path=FIELD_STATE_FILE):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, grid_size, state_offset, image_offset, table_offset, table_length = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION:
+            self.map.close()
+            raise ValueError(f"{path} is not an AGRO-TWIN field state (v{VERSION}) file")
+        self.grid_size = grid_size
+        cells = grid_size * grid_size
+        if np is not None:
+            self.state = np.frombuffer(self.map, np.uint8, cells, state_offset).reshape(grid_size, grid_size)
+            self.image = np.frombuffer(self.map, '<u2', cells, image_offset).reshape(grid_size, grid_size)
+        else:
+            view = memoryview(self.map)
+            self.state = view[state_offset:state_offset + cells]
+            self.image = view[image_offset:image_offset + 2 * cells].cast('H')
+        self.table = json.loads(self.map[table_offset:table_offset + table_length])
+
+    def close(self):
+        # Views must go before the mapping can be closed
+        self.state = self.image = None
+        self.map.close()
+
+    def cell(self, row, col):
+        """(is_defective, folder, image_name) for one plant."""
+        if np is not None:
+            state, image = self.state[row, col], self.image[row, col]
+        else:
+            i = row * self.grid_size + col
+            state, image = self.state[i], self.image[i]
+        folder, name = self.table[int(image)]
+        return bool(state == DEFECTIVE), folder, name
+
+    def defective_spots(self):
+        if np is not None:
+            return {divmod(int(i), self.grid_size) for i in np.flatnonzero(self.state == DEFECTIVE)}
+        return {divmod(i, self.grid_size) for i, state in enumerate(self.state) if state == DEFECTIVE}
+
+    @property
+    def defective_count(self):
+        if np is not None:
+            return int(np.count_nonzero(self.state == DEFECTIVE))
+        return sum(1 for state in self.state if state == DEFECTIVE)
+
+    def plants(self, rows=None, cols=None):
+        """
+        Plant records for the whole field, or the block `rows` x `cols` (ranges),
+        like seed_field but without re-rolling images. Each row is read as one
+        slice, so this costs about as much as seed_field itself.
+        """
+        grid_size = self.grid_size
+        rows = rows if rows is not None else range(grid_size)
+        cols = cols if cols is not None else range(grid_size)
+        start_offset = field_origin(grid_size)
+        xs = [start_offset + col * SPACING for col in cols]
+        plants = []
+        for row in rows:
+            z_pos = start_offset + row * SPACING
+            if np is not None:
+                states, images = self.state[row, cols.start:cols.stop].tolist(), self.image[row, cols.start:cols.stop].tolist()
+            else:
+                first = row * grid_size
+                states, images = self.state[first + cols.start:first + cols.stop].tolist(), self.image[first + cols.start:first + cols.stop].tolist()
+            for col, x_pos, state, image in zip(cols, xs, states, images):
+                folder, name = self.table[image]
+                plants.append(Plant(row, col, x_pos, z_pos, state == DEFECTIVE, name, folder))
+        return plants
+
+# --- LAZY PLANTS ---
+# Startup on a packed field never builds the whole field: plants come into being as the bot gets near them.
+class PlantCells(dict):
+    """
+    Drop-in for SpatialGrid.cells over a packed field: a cell's Plant is built
+    from the mapping the first time it is asked for and then kept, so whatever
+    the sim stores on it (entity, spread relabels) sticks.
+    """
+    def __init__(self, field_state):
+        super().__init__()
+        self.field_state = field_state
+
+    def get(self, key, default=None):
+        plant = dict.get(self, key)
+        if plant is None:
+            row, col = key
+            if not (0 <= row < self.field_state.grid_size and 0 <= col < self.field_state.grid_size): return default
+            plant = self[key] = self.field_state.plants(range(row, row + 1), range(col, col + 1))[0]
+        return plant
+
+    def block(self, rows, cols):
+        """Plants of a rectangular block, building the missing ones a row slice at a time."""
+        for plant in self.field_state.plants(rows, cols):
+            self.setdefault((plant.row, plant.col), plant)
+        return [dict.get(self, (row, col)) for row in rows for col in cols]
+
+class PlantChunks:
+    """Drop-in for group_by_chunk() over a packed field: a chunk's plants are built when it is first loaded."""
+    def __init__(self, cells, chunk_size=CHUNK_SIZE):
+        self.cells = cells
+        self.chunk_size = chunk_size
+        self.chunk_count = -(-cells.field_state.grid_size // chunk_size)
+
+    def __contains__(self, key):
+        return 0 <= key[0] < self.chunk_count and 0 <= key[1] < self.chunk_count
+
+    def __getitem__(self, key):
+        grid_size, size = self.cells.field_state.grid_size, self.chunk_size
+        rows = range(key[0] * size, min((key[0] + 1) * size, grid_size))
+        cols = range(key[1] * size, min((key[1] + 1) * size, grid_size))
+        return self.cells.block(rows, cols)
+
+def open_field_state(path=FIELD_STATE_FILE, config_path=CONFIG_FILE):
+    """The packed field if it exists and is not older than the jury config (else None: use the JSON)."""
+    if not os.path.exists(path): return None
+    if os.path.exists(config_path) and os.path.getmtime(config_path) > os.path.getmtime(path):
+        print(f"⚠️ {path} is older than {config_path}; re-run agrotwin_fieldstate.py to refresh it.")
+        return None
+    try:
+        return FieldState(path)
+    except (OSError, ValueError, struct.error) as e:
+        print(f"⚠️ Could not open {path}: {e}")
+        return None
+
+# --- CLI ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert the jury's field_config.json into the packed binary field format.")
+    parser.add_argument("--config", default=CONFIG_FILE, help="jury seeding file to convert")
+    parser.add_argument("--out", default=FIELD_STATE_FILE)
+    parser.add_argument("--grid-size", type=int, help="override the configured field size")
+    parser.add_argument("--seed", type=int, default=0, help="image assignment seed (same as agrotwin_headless.py)")
+    parser.add_argument("--info", action="store_true", help="describe an existing --out file instead of converting")
+    args = parser.parse_args(argv)
+
+    if not args.info:
+        config_size, spots = load_jury_config(args.config)
+        manifest = load_manifest([HEALTHY_DIR, UNHEALTHY_DIR])
+        healthy = (HEALTHY_DIR, manifest.images(HEALTHY_DIR) or ["placeholder.png"])
+        unhealthy = (UNHEALTHY_DIR, manifest.images(UNHEALTHY_DIR) or ["placeholder.png"])
+        write_field_state(args.out, args.grid_size or config_size, spots, healthy, unhealthy, args.seed)
+
+    field = FieldState(args.out)
+    print(json.dumps({
+        "file": args.out, "bytes": os.path.getsize(args.out), "grid_size": field.grid_size,
+        "defective": field.defective_count, "images": len(field.table), "numpy": np is not None,
+    }))
+    field.close()
+
+if __name__ == "__main__":
+    main()
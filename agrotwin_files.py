@@ -0,0 +1,39 @@
+import os
+import stat
+import tempfile
+from contextlib import contextmanager
+
+# --- ATOMIC FILE REPLACEMENT ---
+def file_mode(path):
+    """The permission bits of an existing `path`, else those of a new file under the current umask."""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+@contextmanager
+def atomic_open(path, mode='w'):
+    """
+    Writes to a uniquely named temp file beside `path` and renames it over
+    `path` once the block finishes (the temp file is removed on error).
+    Unique names matter because the sim, headless workers, batch runs and
+    the chat service may save the same file at once: each writer gets its
+    own temp file, so readers only ever see a complete file and the last
+    finished write wins.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+        # mkstemp creates 0600 files; give the result the mode a plain open() would have
+        os.chmod(tmp_path, file_mode(path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,265 @@
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+from agrotwin_assets import load_manifest
+from agrotwin_planner import plan_route, route_points
+from agrotwin_field import (
+    SpatialGrid, SPACING, BOT_SPEED, BOT_HEIGHT, SCAN_RADIUS,
+    load_jury_config, field_origin, seed_field, build_scan_report
+)
+
+# --- 1. CONFIGURATION ---
+HEALTHY_DIR = "healthy crops"
+UNHEALTHY_DIR = "unhealthy crops"
+SCAN_REACH = math.sqrt(SCAN_RADIUS ** 2 - BOT_HEIGHT ** 2)  # horizontal reach of the 3D scan radius
+
+# --- 2. HEADLESS FIELD ---
+class HeadlessField:
+    """
+    The simulator's field without Ursina: same jury seeding, same image
+    assignment and the same spatial index, but no window, entities or Tk.
+    Each row draws from its own seeded RNG stream, so any band of rows can be
+    rebuilt on its own (e.g. in a worker process) with identical plants.
+    Workers should be handed the parent's `manifest` so they never write it.
+    """
+    def __init__(self, grid_size, defective_spots, seed=None, rows=None, defect_rate=None, manifest=None):
+        self.grid_size = grid_size
+        self.rows = rows if rows is not None else range(grid_size)
+        self.manifest = manifest or load_manifest([HEALTHY_DIR, UNHEALTHY_DIR])
+        healthy = (HEALTHY_DIR, self.manifest.images(HEALTHY_DIR) or ["placeholder.png"])
+        unhealthy = (UNHEALTHY_DIR, self.manifest.images(UNHEALTHY_DIR) or ["placeholder.png"])
+        self.plants = []
+        for row in self.rows:
+            rng = random.Random((seed or 0) * 1000003 + row)
+            if defect_rate is not None:
+                defective_spots = {(row, col) for col in range(grid_size) if rng.random() < defect_rate}
+            self.plants += seed_field(grid_size, defective_spots, healthy, unhealthy, rng, rows=(row,))
+        self.index = SpatialGrid(field_origin(grid_size), SPACING)
+        for plant in self.plants:
+            self.index.insert(plant.row, plant.col, plant)
+
+    @classmethod
+    def from_config(cls, path, grid_size=None, defect_rate=None, seed=None, rows=None, manifest=None):
+        """Loads the jury config; optionally overrides its size or infects a random share of cells."""
+        config_size, spots = load_jury_config(path)
+        return cls(grid_size or config_size, spots, seed, rows, defect_rate, manifest)
+
+    @property
+    def defective_count(self):
+        return sum(1 for plant in self.plants if plant.is_defective)
+
+# --- 3. SCRIPTED PATROLS ---
+def serpentine_route(grid_size, by_columns=False, lines=None, start=(0.0, 0.0)):
+    """Boustrophedon sweep along every plant row (or column) in `lines`, starting from `start`."""
+    first, last = field_origin(grid_size), -field_origin(grid_size)
+    route = [start]
+    for i, line in enumerate(lines if lines is not None else range(grid_size)):
+        pos = first + line * SPACING
+        a, b = (first, last) if i % 2 == 0 else (last, first)
+        if by_columns:
+            route += [(pos, route[-1][1]), (pos, a), (pos, b)]
+        else:
+            route += [(route[-1][0], pos), (a, pos), (b, pos)]
+    return route
+
+def random_route(grid_size, legs, rng):
+    """Random axis-aligned legs between plant lines, like a driver tapping one WASD key at a time."""
+    lines = [field_origin(grid_size) + i * SPACING for i in range(grid_size)]
+    x, z = 0.0, 0.0
+    route = [(x, z)]
+    for leg in range(legs):
+        if leg % 2 == 0: x = rng.choice(lines)
+        else: z = rng.choice(lines)
+        route.append((x, z))
+    return route
+
+def run_patrol(field, route, patrol_id=0, on_scan=None):
+    """
+    Drives the bot along `route` at BOT_SPEED with the simulator's axis-aligned
+    movement and scans every plant the first time it comes within SCAN_RADIUS.
+    Range entry is solved per leg against the grid index instead of stepping
+    frames, so a patrol costs O(cells passed) regardless of frame rate.
+    Returns (scanned_plants, path_length, duration_seconds).
+    """
+    scanned = set()
+    travelled = 0.0
+    for (x0, z0), (x1, z1) in zip(route, route[1:]):
+        length = math.hypot(x1 - x0, z1 - z0)
+        if length == 0: continue
+        ux, uz = (x1 - x0) / length, (z1 - z0) / length
+        hits = []
+        box = (min(x0, x1) - SCAN_REACH, min(z0, z1) - SCAN_REACH, max(x0, x1) + SCAN_REACH, max(z0, z1) + SCAN_REACH)
+        for plant in field.index.in_box(*box):
+            if plant in scanned: continue
+            rx, rz = plant.x - x0, plant.z - z0
+            along = rx * ux + rz * uz
+            gap_sq = rx * rx + rz * rz - along * along
+            if gap_sq >= SCAN_REACH ** 2: continue
+            enter = max(0.0, along - math.sqrt(SCAN_REACH ** 2 - gap_sq))
+            if enter < length and along + math.sqrt(SCAN_REACH ** 2 - gap_sq) > 0:
+                hits.append((enter, plant))
+        hits.sort(key=lambda hit: hit[0])
+        for enter, plant in hits:
+            scanned.add(plant)
+            if on_scan:
+                on_scan(patrol_id, (travelled + enter) / BOT_SPEED, plant, x0 + ux * enter, z0 + uz * enter)
+        travelled += length
+    return scanned, travelled, travelled / BOT_SPEED
+
+def patrol_routes(field, strategy, count, legs, seed):
+    rng = random.Random(seed)
+    planned = None
+    for patrol_id in range(count):
+        if strategy == 'rows': yield serpentine_route(field.grid_size)
+        elif strategy == 'columns': yield serpentine_route(field.grid_size, by_columns=True)
+        elif strategy == 'planned':
+            # Tour over the defective plants only (nearest neighbour + 2-opt); the same every patrol
+            if planned is None:
+                planned = route_points(plan_route([plant for plant in field.plants if plant.is_defective]))
+            yield planned
+        else: yield random_route(field.grid_size, legs, rng)
+
+# --- 4. MULTI-BOT SURVEY ---
+def split_rows(grid_size, bots):
+    """Disjoint, contiguous row bands, one per bot."""
+    bots = max(1, min(bots, grid_size))
+    edges = [grid_size * i // bots for i in range(bots + 1)]
+    return [range(edges[i], edges[i + 1]) for i in range(bots)]
+
+def sweep_region(task):
+    """
+    Worker entry point: rebuilds one bot's band of the field and sweeps it.
+    Module-level so a multiprocessing pool can pickle it.
+    """
+    config_path, grid_size, defect_rate, seed, bot_id, rows, manifest = task
+    field = HeadlessField.from_config(config_path, grid_size, defect_rate, seed, rows, manifest)
+    reports = []
+
+    def collect(patrol_id, t, plant, x, z):
+        report = build_scan_report(plant, x, z, field.manifest)
+        report.update({"bot": bot_id, "t": round(t, 3), "row": plant.row, "col": plant.col})
+        reports.append(report)
+
+    start = (field_origin(field.grid_size), field_origin(field.grid_size) + rows.start * SPACING)
+    scanned, length, duration = run_patrol(field, serpentine_route(field.grid_size, lines=rows, start=start), bot_id, collect)
+    return {
+        "bot": bot_id, "rows": [rows.start, rows.stop], "plants": len(field.plants), "scans": len(scanned),
+        "path_length": round(length, 1), "seconds": round(duration, 2), "reports": reports,
+    }
+
+def merge_health_report(grid_size, results):
+    """Folds per-bot sweeps into one field health report."""
+    counts = {"HEALTHY": 0, "DEFECTIVE / UNHEALTHY": 0, "UNKNOWN STATUS": 0}
+    diseases = {}
+    defective_spots = []
+    for result in results:
+        for report in result["reports"]:
+            counts[report["status"]] = counts.get(report["status"], 0) + 1
+            if report["status"] == "DEFECTIVE / UNHEALTHY":
+                key = f"{report['crop']} / {report['disease']}"
+                diseases[key] = diseases.get(key, 0) + 1
+                defective_spots.append({"row": report["row"], "col": report["col"], "crop": report["crop"], "disease": report["disease"]})
+    scanned = sum(counts.values())
+    return {
+        "grid_size": grid_size, "plants_scanned": scanned,
+        "coverage": round(scanned / (grid_size * grid_size), 4),
+        "healthy": counts["HEALTHY"], "defective": counts["DEFECTIVE / UNHEALTHY"], "unknown": counts["UNKNOWN STATUS"],
+        "diseases": dict(sorted(diseases.items(), key=lambda item: -item[1])),
+        "defective_spots": sorted(defective_spots, key=lambda spot: (spot["row"], spot["col"])),
+        # Bots run simultaneously in the field, so the survey takes as long as the slowest one
+        "survey_seconds": max((result["seconds"] for result in results), default=0),
+        "bots": [{k: v for k, v in result.items() if k != "reports"} for result in results],
+    }
+
+def survey_field(config_path, bots, workers=None, grid_size=None, defect_rate=None, seed=0):
+    """Splits the field into one row band per bot and sweeps the bands on a process pool."""
+    size = grid_size or load_jury_config(config_path)[0]
+    # Index the images once here: workers refreshing the manifest themselves would race to save it
+    manifest = load_manifest([HEALTHY_DIR, UNHEALTHY_DIR])
+    tasks = [(config_path, size, defect_rate, seed, bot_id, rows, manifest) for bot_id, rows in enumerate(split_rows(size, bots))]
+    if (workers or bots) > 1 and len(tasks) > 1:
+        with multiprocessing.Pool(processes=workers or min(len(tasks), os.cpu_count() or 1)) as pool:
+            results = pool.map(sweep_region, tasks)
+    else:
+        results = [sweep_region(task) for task in tasks]
+    return results, merge_health_report(size, results)
+
+# --- 5. CLI ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run scripted AGRO-TWIN bot patrols without a display.")
+    parser.add_argument("--config", default="field_config.json", help="jury seeding file")
+    parser.add_argument("--grid-size", type=int, help="override the configured field size")
+    parser.add_argument("--defect-rate", type=float, help="infect this share of cells at random instead of the jury spots")
+    parser.add_argument("--strategy", choices=["rows", "columns", "random", "planned"], default="rows")
+    parser.add_argument("--patrols", type=int, default=1)
+    parser.add_argument("--legs", type=int, default=50, help="legs per random patrol")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="JSONL file for scan reports (default: stdout)")
+    parser.add_argument("--no-reports", action="store_true", help="skip report output to time the engine alone")
+    parser.add_argument("--bots", type=int, help="survey mode: sweep the field with N bots on disjoint row bands")
+    parser.add_argument("--workers", type=int, help="survey mode: process pool size (default: one per bot, up to CPU count)")
+    parser.add_argument("--health-report", help="survey mode: write the merged field health report here (default: stderr)")
+    args = parser.parse_args(argv)
+
+    if args.bots:
+        return run_survey(args)
+
+    field = HeadlessField.from_config(args.config, args.grid_size, args.defect_rate, args.seed)
+    out = None if args.no_reports else (open(args.out, 'w') if args.out else sys.stdout)
+
+    last_defect_scan = {}
+
+    def on_scan(patrol_id, t, plant, x, z):
+        if plant.is_defective: last_defect_scan[patrol_id] = t
+        if out is None: return
+        report = build_scan_report(plant, x, z, field.manifest)
+        report.update({"patrol": patrol_id, "t": round(t, 3), "row": plant.row, "col": plant.col})
+        out.write(json.dumps(report) + "\n")
+
+    started = time.perf_counter()
+    scans = defects_found = 0
+    path_lengths, coverage_times = [], []
+    for patrol_id, route in enumerate(patrol_routes(field, args.strategy, args.patrols, args.legs, args.seed)):
+        scanned, length, _ = run_patrol(field, route, patrol_id, on_scan)
+        found = sum(1 for plant in scanned if plant.is_defective)
+        scans += len(scanned)
+        defects_found += found
+        path_lengths.append(length)
+        # Time until the last defective plant was scanned, for patrols that found them all
+        if found == field.defective_count: coverage_times.append(last_defect_scan.get(patrol_id, 0.0))
+    elapsed = time.perf_counter() - started
+
+    if out and out is not sys.stdout: out.close()
+    total_defects = field.defective_count * args.patrols
+    print(json.dumps({
+        "grid_size": field.grid_size, "strategy": args.strategy, "patrols": args.patrols,
+        "scans": scans, "defect_coverage": round(defects_found / total_defects, 4) if total_defects else None,
+        "mean_path_length": round(sum(path_lengths) / len(path_lengths), 1) if path_lengths else None,
+        "full_coverage_patrols": len(coverage_times),
+        "mean_time_to_coverage": round(sum(coverage_times) / len(coverage_times), 2) if coverage_times else None,
+        "seconds": round(elapsed, 4), "patrols_per_second": round(args.patrols / elapsed, 1) if elapsed else None,
+    }), file=sys.stderr)
+
+def run_survey(args):
+    started = time.perf_counter()
+    results, health = survey_field(args.config, args.bots, args.workers, args.grid_size, args.defect_rate, args.seed)
+    health["compute_seconds"] = round(time.perf_counter() - started, 4)
+    if not args.no_reports:
+        out = open(args.out, 'w') if args.out else sys.stdout
+        for result in results:
+            for report in result["reports"]:
+                out.write(json.dumps(report) + "\n")
+        if out is not sys.stdout: out.close()
+    if args.health_report:
+        with open(args.health_report, 'w') as f:
+            json.dump(health, f, indent=4)
+    else:
+        print(json.dumps(health), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client
+
+# --- 1. PROTOCOL ---
+# Messages are plain dicts sent over a multiprocessing Connection:
+#   {"op": "ping"}                               -> {"op": "pong"}
+#   {"op": "consult", "context": {...}}          -> {"op": "ok"}   (opens the chat window on that scan)
+#   {"op": "ask", "question": str, "context"?}   -> {"op": "chunk", "text": str}* then {"op": "done"}
+SERVICE_ADDRESS = ("127.0.0.1", int(os.environ.get("AGROTWIN_CHAT_PORT", 50607)))
+# Connections unpickle what they receive, so the key is random per launch: the simulator generates
+# it and hands it to the service it spawns through the environment, never on the command line.
+AUTHKEY_ENV = "AGROTWIN_CHAT_AUTHKEY"
+AUTHKEY = bytes.fromhex(os.environ[AUTHKEY_ENV]) if os.environ.get(AUTHKEY_ENV) else os.urandom(32)
+CHAT_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "agrotwin_chat.py")
+
+# --- 2. SIMULATOR-SIDE CLIENT ---
+class ExpertClient:
+    """
+    Keeps one connection to the long-lived chat service, starting the service
+    on first use if nobody is listening yet. The service stays up while this
+    connection is open and exits once it closes. All calls are thread-safe.
+    """
+    def __init__(self, address=SERVICE_ADDRESS, authkey=AUTHKEY):
+        self.address = address
+        self.authkey = authkey
+        self.conn = None
+        self.lock = threading.Lock()
+
+    def connect(self, timeout=30.0):
+        if self.conn is not None: return self.conn
+        deadline = time.monotonic() + timeout
+        spawned = False
+        while True:
+            try:
+                self.conn = Client(self.address, authkey=self.authkey)
+                return self.conn
+            except AuthenticationError:
+                raise ConnectionError(f"port {self.address[1]} is held by a chat service from another launch")
+            except ConnectionRefusedError:
+                if not spawned:
+                    subprocess.Popen([sys.executable, CHAT_SCRIPT, "--serve"], cwd=os.path.dirname(CHAT_SCRIPT),
+                                     env=dict(os.environ, **{AUTHKEY_ENV: self.authkey.hex()}))
+                    spawned = True
+                if time.monotonic() > deadline: raise
+                time.sleep(0.1)
+
+    def warm_up(self):
+        """Starts (or finds) the service in the background so the first consultation is instant."""
+        def ping():
+            try:
+                self.request({"op": "ping"})
+            except (EOFError, OSError) as e:
+                print(f"[EXPERT LINK] Chat service unavailable: {e}")
+        threading.Thread(target=ping, daemon=True).start()
+
+    def request(self, message):
+        with self.lock:
+            try:
+                conn = self.connect()
+                conn.send(message)
+                return conn.recv()
+            except (EOFError, OSError):
+                self.conn = None  # Service went away; the next call reconnects or respawns it
+                raise
+
+    def consult(self, context):
+        return self.request({"op": "consult", "context": context})
+
+    def ask(self, question, context=None):
+        """Yields answer chunks as the service streams them."""
+        with self.lock:
+            conn = self.connect()
+            conn.send({"op": "ask", "question": question, "context": context})
+            done = False
+            try:
+                while not done:
+                    reply = conn.recv()
+                    done = reply["op"] == "done"
+                    if not done: yield reply["text"]
+            finally:
+                # Drain an abandoned stream so the next request starts on a clean connection
+                while not done:
+                    done = conn.recv()["op"] == "done"
@@ -0,0 +1,70 @@
+import os
+import re
+import time
+
+# --- 1. BACKEND INTERFACE ---
+DEFAULT_MODEL = 'gemini-2.5-pro'
+
+class LLMBackend:
+    """A text generator the agent talks to. Subclasses implement stream(prompt)."""
+    name = "base"
+
+    def stream(self, prompt):
+        """Yields the reply to `prompt` in chunks."""
+        raise NotImplementedError
+
+    def generate(self, prompt):
+        return "".join(self.stream(prompt))
+
+# --- 2. GEMINI ---
+class GeminiBackend(LLMBackend):
+    """Google Gemini with one GenerativeModel client reused for every request."""
+    name = "gemini"
+
+    def __init__(self, api_key, model_name=DEFAULT_MODEL):
+        import google.generativeai as genai  # Imported here so offline backends never need the SDK
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model_name)
+
+    def stream(self, prompt):
+        for chunk in self.model.generate_content(prompt, stream=True):
+            yield chunk.text
+
+# --- 3. LOCAL STUB ---
+class StubBackend(LLMBackend):
+    """
+    Deterministic offline stand-in: the same prompt always gives the same
+    reply, built from the crop/condition and the farmer's question. Useful for
+    tests and for benchmarking prompt building and UI overhead without network.
+    `delay` seconds are slept before each chunk to imitate a streaming model.
+    """
+    name = "stub"
+
+    def __init__(self, chunk_size=24, delay=0.0):
+        self.chunk_size = chunk_size
+        self.delay = delay
+
+    def stream(self, prompt):
+        def field(label):
+            match = re.search(rf"{label}:\s*(.+)", prompt)
+            return match.group(1).strip() if match else "Unknown"
+        questions = re.findall(r"Farmer:\s*(.+)", prompt)
+        question = questions[-1].strip() if questions else ""
+        reply = (f"[offline expert] For {field('Crop')} ({field('Condition')}): "
+                 f"you asked \"{question}\". Inspect affected leaves, remove badly damaged parts "
+                 f"and follow the local extension service's recommended treatment.")
+        for start in range(0, len(reply), self.chunk_size):
+            if self.delay: time.sleep(self.delay)
+            yield reply[start:start + self.chunk_size]
+
+# --- 4. SELECTION ---
+BACKENDS = {"gemini": GeminiBackend, "stub": StubBackend}
+
+def make_backend(api_key, name=None):
+    """Builds the backend named by `name` or $AGROTWIN_LLM_BACKEND (default: gemini)."""
+    name = (name or os.environ.get("AGROTWIN_LLM_BACKEND", "gemini")).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown LLM backend {name!r}; choose from {', '.join(BACKENDS)}")
+    if name == "gemini":
+        return GeminiBackend(api_key)
+    return BACKENDS[name]()
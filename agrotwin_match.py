@@ -0,0 +1,88 @@
+import difflib
+import math
+from collections import Counter, defaultdict
+from itertools import chain
+
+# --- BIGRAM QUESTION INDEX ---
+def bigrams(text):
+    """Character bigrams of `text`, each tagged with its occurrence number so set overlap counts repeats."""
+    text = text.lower()
+    seen = Counter()
+    keys = []
+    for i in range(len(text) - 1):
+        gram = text[i:i + 2]
+        seen[gram] += 1
+        keys.append((gram, seen[gram]))
+    return keys
+
+class QuestionIndex:
+    """
+    Character-bigram inverted index over known questions.
+    A query only touches the posting lists of its own bigrams to find the
+    questions that overlap it enough to possibly match; SequenceMatcher then
+    runs on those alone (after its cheap upper bounds), so matching no longer
+    scans the whole knowledge base. Scores and picks are the same
+    SequenceMatcher ratio as a full scan.
+    """
+    def __init__(self):
+        self.postings = defaultdict(set)  # (bigram, occurrence) -> {item_id}
+        self.items = {}                   # item_id -> (lowered text, payload)
+        self.next_id = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, text, payload):
+        item_id = self.next_id
+        self.next_id += 1
+        self.items[item_id] = (text.lower(), payload)
+        for key in bigrams(text):
+            self.postings[key].add(item_id)
+        return item_id
+
+    def remove(self, item_id):
+        text, _ = self.items.pop(item_id)
+        for key in bigrams(text):
+            ids = self.postings[key]
+            ids.discard(item_id)
+            if not ids: del self.postings[key]
+
+    def candidates(self, query, threshold=0.8):
+        """
+        Ids (in index order) of every item whose SequenceMatcher ratio with
+        `query` can exceed `threshold`. The ratio is 2M / (n + m) for M matched
+        characters in K blocks, and neighbouring blocks are split by at least one
+        unmatched character, so K <= n + m - 2M + 1. A block of length L holds
+        L - 1 bigrams found in both strings, so a ratio above t means sharing
+        more than (1.5t - 1)(n + m) - 1 bigrams. Lengths alone already need
+        m > n * t / (2 - t), which fixes how many of the query's bigrams any
+        match shares: only the rarest posting lists that must contain one of
+        them are walked, and the common bigrams ("th", "e ", ...) just top up
+        the items found there.
+        """
+        n = len(query)
+        slope = 1.5 * threshold - 1
+        need = math.floor(slope * 2 * n / (2 - threshold) - 1 - 1e-9) + 1
+        if need < 1:  # Short queries or low thresholds: the overlap says nothing, every item may match
+            return sorted(self.items)
+        keys = sorted(bigrams(query), key=lambda key: len(self.postings.get(key, ())))
+        rare = len(keys) - need + 1
+        shared = Counter(chain.from_iterable(self.postings.get(key, ()) for key in keys[:rare]))
+        for key in keys[rare:]:
+            shared.update(shared.keys() & self.postings.get(key, frozenset()))
+        return sorted(item_id for item_id, count in shared.items()
+                      if count > slope * (n + len(self.items[item_id][0])) - 1 - 1e-9)
+
+    def best_match(self, query, threshold=0.8):
+        """Returns (ratio, payload) of the best question scoring above `threshold`, or None."""
+        query = query.lower()
+        best = None
+        for item_id in self.candidates(query, threshold):  # Index order keeps the old first-wins tie break
+            text, payload = self.items[item_id]
+            matcher = difflib.SequenceMatcher(None, query, text)
+            if matcher.real_quick_ratio() <= threshold or matcher.quick_ratio() <= threshold:
+                continue
+            ratio = matcher.ratio()
+            if ratio > threshold and (best is None or ratio > best[0]):
+                best = (ratio, payload)
+        return best
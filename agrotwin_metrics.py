@@ -0,0 +1,123 @@
+import atexit
+import bisect
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from agrotwin_files import atomic_open
+
+# --- CONFIGURATION ---
+# Opt-in: AGROTWIN_METRICS=1 records timings and writes them at exit to AGROTWIN_METRICS_FILE (+ a .prom twin).
+# By default each program gets its own file (agrotwin_sim.py -> agrotwin_metrics_sim.json), so the sim
+# and the chat service never overwrite each other.
+_program = os.path.splitext(os.path.basename(sys.argv[0] if sys.argv and sys.argv[0] else "python"))[0]
+METRICS_FILE = os.environ.get("AGROTWIN_METRICS_FILE", f"agrotwin_metrics_{_program.replace('agrotwin_', '') or 'python'}.json")
+# Histogram upper bounds in seconds (Prometheus style, roughly 1-2.5-5 per decade)
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# --- HISTOGRAM ---
+class Histogram:
+    """Fixed-bucket latency histogram: constant memory and O(log buckets) per observation."""
+    def __init__(self, bounds=BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value < self.min: self.min = value
+        if value > self.max: self.max = value
+
+    def quantile(self, q):
+        """Estimate by linear interpolation inside the bucket holding the q-th observation."""
+        if not self.count: return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                low = self.bounds[i - 1] if i > 0 else 0.0
+                high = self.bounds[i] if i < len(self.bounds) else self.max
+                low, high = max(low, self.min), min(high, self.max)
+                return low + (high - low) * (rank - seen) / count
+            seen += count
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count, "sum": self.total,
+            "mean": self.total / self.count if self.count else None,
+            "min": self.min if self.count else None, "max": self.max if self.count else None,
+            "p50": self.quantile(0.5), "p95": self.quantile(0.95), "p99": self.quantile(0.99),
+        }
+
+# --- REGISTRY ---
+class Metrics:
+    """
+    Named histograms for the sim and chat hot paths. While disabled,
+    observe() and timed() return immediately, so instrumented code pays
+    one attribute check per call.
+    """
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def observe(self, name, seconds):
+        if not self.enabled: return
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timed(self, name):
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+
+    def snapshot(self):
+        with self.lock:
+            return {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+
+    def to_prometheus(self):
+        lines = []
+        with self.lock:
+            for name, histogram in sorted(self.histograms.items()):
+                metric = f"agrotwin_{name}_seconds"
+                lines.append(f"# TYPE {metric} histogram")
+                cumulative = 0
+                for bound, count in zip([repr(b) for b in histogram.bounds] + ["+Inf"], histogram.counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+                lines.append(f"{metric}_sum {histogram.total}")
+                lines.append(f"{metric}_count {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path=METRICS_FILE):
+        """Writes the JSON summary to `path` and the Prometheus text format next to it (.prom)."""
+        if not self.histograms: return
+        data = {"written": time.strftime("%Y-%m-%dT%H:%M:%S"), "pid": os.getpid(), "metrics": self.snapshot()}
+        for target, text in ((path, json.dumps(data, indent=4)), (os.path.splitext(path)[0] + ".prom", self.to_prometheus())):
+            with atomic_open(target) as f:
+                f.write(text)
+
+metrics = Metrics(enabled=os.environ.get("AGROTWIN_METRICS", "0").lower() not in ("", "0", "false", "no"))
+if metrics.enabled:
+    atexit.register(metrics.export)
@@ -0,0 +1,135 @@
+import math
+from collections import defaultdict
+
+# --- CONFIGURATION ---
+NEIGHBOURS = 8         # candidate partners per stop for 2-opt moves
+MAX_PASSES = 50        # 2-opt sweeps over the tour before giving up on further gains
+MAX_SEGMENT = 1000     # longest stretch a single 2-opt move may reverse (keeps huge tours near-linear)
+
+# --- NEAREST-NEIGHBOUR LOOKUP ---
+class PointBuckets:
+    """
+    Uniform buckets over 2D points, sized for about one point per bucket, so
+    nearest-point queries search outward ring by ring instead of scanning
+    every point. Points can be removed as a tour consumes them.
+    """
+    def __init__(self, points):
+        self.points = points
+        xs = [x for x, _ in points]; zs = [z for _, z in points]
+        area = max(max(xs) - min(xs), 1.0) * max(max(zs) - min(zs), 1.0)
+        self.cell = math.sqrt(area / len(points))
+        self.buckets = defaultdict(set)
+        for i, (x, z) in enumerate(points):
+            self.buckets[self.key(x, z)].add(i)
+        keys = self.buckets.keys()
+        self.bounds = (min(k[0] for k in keys), min(k[1] for k in keys), max(k[0] for k in keys), max(k[1] for k in keys))
+        self.size = len(points)
+
+    def key(self, x, z):
+        return (math.floor(x / self.cell), math.floor(z / self.cell))
+
+    def remove(self, i):
+        key = self.key(*self.points[i])
+        self.buckets[key].discard(i)
+        if not self.buckets[key]: del self.buckets[key]
+        self.size -= 1
+
+    def nearest(self, x, z, k=1, skip=None):
+        """Up to `k` (distance, index) pairs closest to (x, z), nearest first."""
+        kx, kz = self.key(x, z)
+        min_x, min_z, max_x, max_z = self.bounds
+        reach = max(kx - min_x, max_x - kx, kz - min_z, max_z - kz)
+        found = []
+        for ring in range(reach + 1):
+            for cx in range(kx - ring, kx + ring + 1):
+                edge = cx in (kx - ring, kx + ring)
+                for cz in (range(kz - ring, kz + ring + 1) if edge else (kz - ring, kz + ring)):
+                    for i in self.buckets.get((cx, cz), ()):
+                        if i != skip:
+                            px, pz = self.points[i]
+                            found.append((math.hypot(px - x, pz - z), i))
+            # Anything outside the rings searched so far is at least ring * cell away
+            if len(found) >= k:
+                found.sort()
+                if found[k - 1][0] <= ring * self.cell: break
+        found.sort()
+        return found[:k]
+
+# --- TOUR CONSTRUCTION ---
+def nearest_neighbour_tour(points, start):
+    """Greedy open tour from `start`: always drive to the closest stop not yet visited."""
+    buckets = PointBuckets(points)
+    tour = []
+    x, z = start
+    while buckets.size:
+        _, i = buckets.nearest(x, z)[0]
+        buckets.remove(i)
+        tour.append(i)
+        x, z = points[i]
+    return tour
+
+def two_opt(points, start, tour, neighbours=NEIGHBOURS, max_passes=MAX_PASSES, max_segment=MAX_SEGMENT):
+    """
+    Improves an open tour (fixed start, free end) in place with 2-opt moves.
+    Only moves that create an edge to one of a stop's `neighbours` nearest
+    stops are tried, which finds nearly all gains at O(n * neighbours) per pass.
+    """
+    nodes = [start] + points             # node 0 is the bot's start and never moves
+    path = [0] + [i + 1 for i in tour]
+    position = {node: p for p, node in enumerate(path)}
+    buckets = PointBuckets(nodes)
+    near = [[j for _, j in buckets.nearest(x, z, neighbours + 1, skip=i)] for i, (x, z) in enumerate(nodes)]
+
+    def dist(a, b):
+        (ax, az), (bx, bz) = nodes[a], nodes[b]
+        return math.hypot(ax - bx, az - bz)
+
+    def reverse(i, j):
+        path[i:j + 1] = path[i:j + 1][::-1]
+        for p in range(i, j + 1):
+            position[path[p]] = p
+
+    last = len(path) - 1
+    for _ in range(max_passes):
+        improved = False
+        for i in range(1, last + 1):
+            a, b = path[i - 1], path[i]
+            # New edge a-c: reverse path[i..j] where c = path[j]
+            for c in near[a]:
+                j = position[c]
+                if j <= i or j - i > max_segment: continue
+                after = dist(b, path[j + 1]) - dist(c, path[j + 1]) if j < last else 0.0
+                if dist(a, c) - dist(a, b) + after < -1e-9:
+                    reverse(i, j)
+                    a, b = path[i - 1], path[i]
+                    improved = True
+            # New edge b-c: reverse path[i..j] where c = path[j + 1]
+            for c in near[b]:
+                j = position[c] - 1
+                if j <= i or j - i > max_segment: continue
+                if dist(a, path[j]) + dist(b, c) - dist(a, b) - dist(path[j], c) < -1e-9:
+                    reverse(i, j)
+                    a, b = path[i - 1], path[i]
+                    improved = True
+        if not improved: break
+    tour[:] = [node - 1 for node in path[1:]]
+    return tour
+
+def plan_route(plants, start=(0.0, 0.0), optimise=True):
+    """
+    Short open tour from `start` that stops at every plant in `plants`
+    (nearest neighbour, then 2-opt). Returns the plants in visiting order.
+    """
+    if not plants: return []
+    points = [(plant.x, plant.z) for plant in plants]
+    tour = nearest_neighbour_tour(points, start)
+    if optimise and len(tour) > 2:
+        two_opt(points, start, tour)
+    return [plants[i] for i in tour]
+
+def route_points(order, start=(0.0, 0.0)):
+    """Waypoints for run_patrol / the 3D autopilot: the start, then each plant."""
+    return [start] + [(plant.x, plant.z) for plant in order]
+
+def route_length(route):
+    return sum(math.hypot(x1 - x0, z1 - z0) for (x0, z0), (x1, z1) in zip(route, route[1:]))
@@ -1,35 +1,44 @@
 import json
+import math
 import random
 import os
 import time
-import sys
-import subprocess
+import threading
+from time import perf_counter
 from ursina import *
 import tkinter as tk
+from agrotwin_assets import TextureLoader, load_manifest
+from agrotwin_ipc import ExpertClient
+from agrotwin_store import ScanHistory
+from agrotwin_fieldstate import PlantCells, PlantChunks, open_field_state
+from agrotwin_planner import plan_route, route_points, route_length
+from agrotwin_metrics import metrics
+from agrotwin_field import (
+    SpatialGrid, SPACING as spacing, CHUNK_SIZE, BOT_SPEED, ChunkManager,
+    load_jury_config, field_origin, seed_field, group_by_chunk, batch_vertices, scan_range_changes, build_scan_report
+)
 
 # --- 1. FILE SYSTEM & ASSET LOADING ---
 HEALTHY_DIR = "healthy crops"
 UNHEALTHY_DIR = "unhealthy crops"
-CONFIG_FILE = "field_config.json"
 
 def get_images_from_folder(folder_path):
-    if not os.path.exists(folder_path):
-        return ["placeholder.png"] 
-    files = [f for f in os.listdir(folder_path) if f.lower().endswith(('.jpg', '.jpeg', '.png'))]
+    files = asset_manifest.images(folder_path)
     if not files: return ["placeholder.png"]
     return files
 
+# Indexed once into asset_manifest.json; only folders whose mtime changed are re-scanned
+asset_manifest = load_manifest([HEALTHY_DIR, UNHEALTHY_DIR])
 healthy_images = get_images_from_folder(HEALTHY_DIR)
 unhealthy_images = get_images_from_folder(UNHEALTHY_DIR)
 
 # --- 2. LOAD JURY CONFIGURATION ---
-def load_jury_config():
-    if not os.path.exists(CONFIG_FILE): return set()
-    with open(CONFIG_FILE, 'r') as f:
-        data = json.load(f)
-        return {(item['row'], item['col']) for item in data['defective_spots']}
-
-jury_selected_spots = load_jury_config()
+# A packed field (python agrotwin_fieldstate.py) is memory-mapped instead of parsing field_config.json
+field_state = open_field_state()
+if field_state:
+    grid_size = field_state.grid_size
+else:
+    grid_size, jury_selected_spots = load_jury_config()
 
 # --- 3. URSINA APP SETUP ---
 app = Ursina()
@@ -39,47 +48,110 @@ window.borderless = False
 window.fullscreen = False
 
 # --- 4. THE 3D FIELD GENERATION ---
+# Small fields keep one textured Entity pair per plant; large ones merge plants into one mesh per chunk.
+# Either way only chunks near the bot are built (see ChunkManager), distant ones become flat impostors.
+ENTITY_MODE_LIMIT = 32
+RENDER_MODE = 'entities' if grid_size <= ENTITY_MODE_LIMIT else 'batched'
+field_extent = grid_size * spacing + 20
+
 ground = Entity(
-    model='plane', scale=(120, 1, 120), color=color.rgb(20, 20, 20), 
-    texture='grid', texture_scale=(10,10), collider='box'
+    model='plane', scale=(field_extent, 1, field_extent), color=color.rgb(20, 20, 20), 
+    texture='grid', texture_scale=(grid_size, grid_size), collider='box'
 )
 
-crops = []
-start_offset = -45; spacing = 10
+start_offset = field_origin(grid_size)
+crop_index = SpatialGrid(start_offset, spacing)
+if field_state:
+    # Plants are built from the mapping per chunk (and per looked-up cell) as the bot gets near them
+    crop_index.cells = PlantCells(field_state)
+    crop_chunks = PlantChunks(crop_index.cells, CHUNK_SIZE)
+else:
+    crops = seed_field(grid_size, jury_selected_spots, (HEALTHY_DIR, healthy_images), (UNHEALTHY_DIR, unhealthy_images))
+    for plant in crops:
+        crop_index.insert(plant.row, plant.col, plant)
+    crop_chunks = group_by_chunk(crops)
 
-for row in range(10):
-    for col in range(10):
-        x_pos = start_offset + (col * spacing)
-        z_pos = start_offset + (row * spacing)
-        
-        if (row, col) in jury_selected_spots:
-            is_defective = True; img = random.choice(unhealthy_images); folder = UNHEALTHY_DIR
-        else:
-            is_defective = False; img = random.choice(healthy_images); folder = HEALTHY_DIR
-            
-        plant = Entity(model='cube', position=(x_pos, 0, z_pos), scale=(1, 3, 1), color=color.green, texture='white_cube', collider='box')
-        foliage = Entity(parent=plant, model='sphere', y=0.5, scale=(1.5, 0.5, 1.5), color=color.green, texture='grass')
-        
-        plant.is_defective = is_defective
-        plant.image_name = img
-        plant.folder_path = folder
-        plant.grid_coords = (row, col)
-        crops.append(plant)
+def build_plant_batch(plants):
+    """One static mesh (stalks + foliage, vertex coloured) for a whole chunk of plants."""
+    vertices = batch_vertices(plants)
+    mesh = Mesh(vertices=vertices, colors=[color.green] * len(vertices), mode='triangle', static=True)
+    return Entity(model=mesh, double_sided=True)
+
+def load_chunk_detail(key, plants):
+    if RENDER_MODE == 'batched':
+        return build_plant_batch(plants)
+    holder = Entity()
+    for plant in plants:
+        plant.entity = Entity(parent=holder, model='cube', position=(plant.x, 0, plant.z), scale=(1, 3, 1), color=color.green, texture='white_cube')
+        Entity(parent=plant.entity, model='sphere', y=0.5, scale=(1.5, 0.5, 1.5), color=color.green, texture='grass')
+    holder.plants = plants
+    return holder
+
+def load_chunk_impostor(key, plants):
+    """A single flat green tile standing in for a distant chunk."""
+    xs = [p.x for p in plants]; zs = [p.z for p in plants]
+    return Entity(
+        model='quad', rotation_x=90, color=color.rgb(30, 90, 30),
+        position=((min(xs) + max(xs)) / 2, 0.1, (min(zs) + max(zs)) / 2),
+        scale=(max(xs) - min(xs) + spacing / 2, max(zs) - min(zs) + spacing / 2)
+    )
+
+def unload_chunk(handle):
+    for plant in getattr(handle, 'plants', ()):
+        plant.entity = None
+    destroy(handle)
+
+chunk_manager = ChunkManager(
+    crop_chunks, crop_index, CHUNK_SIZE,
+    load_chunk_detail, load_chunk_impostor, unload_chunk
+)
+
+# Highlights are separate overlay spheres in batched mode, so merged geometry is never rebuilt per frame
+highlight_pool = []
+highlight_overlays = {}
+
+def set_highlight(plant, on):
+    if plant.entity:
+        plant.entity.children[0].color = color.yellow if on else color.green
+    elif on:
+        overlay = highlight_pool.pop() if highlight_pool else Entity(model='sphere', scale=1.6, color=color.yellow)
+        overlay.position = (plant.x, 1.5, plant.z)
+        overlay.enabled = True
+        highlight_overlays[plant] = overlay
+    else:
+        overlay = highlight_overlays.pop(plant)
+        overlay.enabled = False
+        highlight_pool.append(overlay)
 
 bot = Entity(model='cube', color=color.cyan, scale=(2, 2, 2), y=1, position=(0, 1, 0))
 PointLight(parent=bot, color=color.cyan, range=15)
+chunk_manager.update(bot.x, bot.z)
 
 # --- 5. IMAGE PANEL ---
+TEXTURE_BUDGET_MB = int(os.environ.get("AGROTWIN_TEXTURE_BUDGET_MB", 64))
+texture_loader = TextureLoader(TEXTURE_BUDGET_MB * 1024 * 1024, finalize=Texture)
+pending_scan = None
+scan_history = ScanHistory()
+
 image_panel = Entity(
     parent=camera.ui, model='quad', scale=(0.5, 0.5), position=(0, 0),
     color=color.white, texture='white_cube', enabled=False
 )
 
+# The Tk popup blocks Ursina's loop, so the frame after it reports the whole popup as its time.dt
+popup_closed = False
+
 def close_ursina_panel():
+    global popup_closed
     image_panel.enabled = False
     mouse.locked = True
+    popup_closed = True
 
 # --- 6. TKINTER POPUP & TRANSITION LOGIC ---
+# The chat service is started in the background now so consulting it later costs one message
+expert = ExpertClient()
+expert.warm_up()
+
 def open_details_popup(data):
     root = tk.Tk()
     root.title("AGRO-TWIN Report")
@@ -107,22 +179,23 @@ def open_details_popup(data):
     # --- RESUME BUTTON ---
     tk.Button(root, text="RESUME SIMULATION", bg="#555", fg="white", command=root.destroy).pack(fill="x", padx=40, pady=5)
 
-    # --- NEXT BUTTON (FIXED) ---
+    # --- NEXT BUTTON ---
     def launch_expert_ai():
-        # 1. Save Data
+        # 1. Save Data (still read by a standalone `python agrotwin_chat.py`)
         session_data = {"crop": data['crop'], "disease": data['disease'], "status": data['status']}
         with open("current_session.json", "w") as f:
             json.dump(session_data, f)
             
-        print("Launching Chatbot...")
-        
-        # 2. Launch Chatbot INDEPENDENTLY using sys.executable
-        # This uses the exact same python.exe that is running this script
-        subprocess.Popen([sys.executable, "agrotwin_chat.py"])
+        print("Consulting Chatbot...")
         
-        # 3. FORCE KILL this simulation script
-        # root.destroy() isn't enough; we need to kill the process to close the Ursina window
-        os._exit(0) 
+        # 2. Hand the scan to the already-running chat service; the simulation keeps going
+        def consult():
+            try:
+                expert.consult(session_data)
+            except (EOFError, OSError) as e:
+                print(f"[EXPERT LINK] Could not reach chat service: {e}")
+        threading.Thread(target=consult, daemon=True).start()
+        root.destroy()
 
     tk.Button(
         root, text="NEXT: CONSULT AI EXPERT ➤", bg="#0275d8", fg="white", 
@@ -133,24 +206,20 @@ def open_details_popup(data):
     close_ursina_panel()
 
 def open_scan_sequence(plant):
-    filename_clean = os.path.splitext(plant.image_name)[0]
-    if '-' in filename_clean:
-        parts = filename_clean.split('-', 1)
-        crop_name = parts[0].capitalize()
-        if not plant.is_defective:
-            disease_name = "None (Healthy)"; status_str = "HEALTHY"
-        else:
-            disease_name = parts[1].replace('_', ' ').title(); status_str = "DEFECTIVE / UNHEALTHY"
-    else:
-        crop_name = "Unknown"; disease_name = "Unknown"; status_str = "UNKNOWN STATUS"
-
-    scan_data = {
-        "location": f"X:{int(bot.x)} | Z:{int(bot.z)}",
-        "status": status_str, "crop": crop_name, "disease": disease_name,
-    }
+    global pending_scan
+    if pending_scan: return  # Already waiting on a scan image
+    scanned_plants.add(plant)
+    scan_data = build_scan_report(plant, bot.x, bot.z, asset_manifest)
+    scan_history.record(scan_data, plant.row, plant.col)
 
+    # Decoding happens on the loader threads; update() finishes the scan once the image is ready
     full_path = os.path.join(plant.folder_path, plant.image_name)
-    tex = load_texture(full_path)
+    pending_scan = (full_path, scan_data, perf_counter())
+    texture_loader.request(full_path)
+
+def finish_scan_sequence(full_path, scan_data, requested_at):
+    metrics.observe("texture_load", perf_counter() - requested_at)  # request -> ready, including queueing
+    tex = texture_loader.get(full_path)
     if tex:
         aspect = tex.width / tex.height
         image_panel.scale = (0.6, 0.6 / aspect)
@@ -162,21 +231,139 @@ def open_scan_sequence(plant):
 
 # --- 7. MAIN LOOP ---
 camera.position = (0, 70, -90); camera.rotation_x = 45
+PREFETCH_RADIUS = 2 * spacing
+MAX_FRAME_DT = 0.1  # A stalled frame (window drag, GC pause) moves the bot at most this many seconds' worth
+highlighted = set()
+bot_cell = None
+scanned_plants = set()
+
+# Autopilot (P): drives the bot along a planned tour of the defective plants not scanned yet, scanning each on arrival
+autopilot_route = []
+autopilot_stats = None
+autopilot_text = Text(text="", position=(-0.85, 0.43), color=color.cyan)
+
+def defective_plants():
+    """Every currently defective plant; on a packed field only the defective cells (and plants built so far) are visited."""
+    if not field_state:
+        return [plant for plant in crops if plant.is_defective]
+    # Plants the outbreak relabelled have all been built, so the packed defects plus those cover the field
+    candidates = {crop_index.cells.get(spot) for spot in field_state.defective_spots()} | set(crop_index.cells.values())
+    return sorted((plant for plant in candidates if plant.is_defective), key=lambda plant: (plant.row, plant.col))
+
+def toggle_autopilot():
+    global autopilot_route, autopilot_stats
+    if autopilot_route:
+        autopilot_route = []
+        autopilot_text.text = "Autopilot: cancelled"
+        return
+    targets = [plant for plant in defective_plants() if plant not in scanned_plants]
+    autopilot_route = plan_route(targets, start=(bot.x, bot.z))
+    planned = route_length(route_points(autopilot_route, (bot.x, bot.z)))
+    autopilot_stats = {"plants": len(autopilot_route), "planned": planned, "driven": 0.0, "seconds": 0.0}
+    autopilot_text.text = f"Autopilot: {len(autopilot_route)} plants, {planned:.0f} m planned"
+
+def drive_autopilot(dt):
+    """Moves the bot towards the next stop at BOT_SPEED for `dt` seconds; scans the plant on arrival."""
+    target = autopilot_route[0]
+    dx, dz = target.x - bot.x, target.z - bot.z
+    gap = math.hypot(dx, dz)
+    step = min(gap, BOT_SPEED * dt)
+    if gap > 0:
+        bot.x += dx / gap * step
+        bot.z += dz / gap * step
+    autopilot_stats["driven"] += step
+    autopilot_stats["seconds"] += dt
+    if gap - step > 1e-6: return
+    autopilot_route.pop(0)
+    open_scan_sequence(target)
+    if not autopilot_route:
+        stats = autopilot_stats
+        autopilot_text.text = f"Autopilot: {stats['plants']} plants covered in {stats['seconds']:.1f}s, {stats['driven']:.0f} m driven"
+        print(f"[AUTOPILOT] {stats['plants']} plants, planned {stats['planned']:.0f} m, driven {stats['driven']:.0f} m, time to coverage {stats['seconds']:.1f}s")
+
+def prefetch_nearby_images():
+    """Warms the texture cache for plants around the bot whenever it enters a new cell."""
+    global bot_cell
+    cell = crop_index.cell_of(bot.x, bot.z)
+    if cell == bot_cell: return
+    bot_cell = cell
+    texture_loader.prefetch(os.path.join(p.folder_path, p.image_name) for p in crop_index.nearby(bot.x, bot.z, PREFETCH_RADIUS))
+
+# Opt-in outbreak: AGROTWIN_SPREAD_RATE=<steps per second> lets the jury's infections spread while you patrol
+SPREAD_RATE = float(os.environ.get("AGROTWIN_SPREAD_RATE", 0))
+MAX_SPREAD_STEPS_PER_FRAME = 10
+spread_model = None
+spread_clock = 0.0
+
+def apply_spread(rows, cols, states):
+    """Spread listener: re-labels changed plants so the next scan shows the new diagnosis and image."""
+    for row, col, state in zip(rows.tolist(), cols.tolist(), states.tolist()):
+        plant = crop_index.cells.get((row, col))
+        if plant is None: continue
+        plant.is_defective = bool(state)
+        if plant.is_defective:
+            plant.folder_path, plant.image_name = UNHEALTHY_DIR, random.choice(unhealthy_images)
+        else:
+            plant.folder_path, plant.image_name = HEALTHY_DIR, random.choice(healthy_images)
+    outbreak_text.text = f"Outbreak: {spread_model.infected_count} infected (step {spread_model.t})"
+
+if SPREAD_RATE > 0:
+    from agrotwin_spread import SpreadModel
+    if field_state:
+        spread_model = SpreadModel.from_field_state(field_state)
+    else:
+        spread_model = SpreadModel(grid_size, [(p.row, p.col) for p in crops if p.is_defective])
+    spread_model.add_listener(apply_spread)
+    outbreak_text = Text(text=f"Outbreak: {spread_model.infected_count} infected", position=(-0.85, 0.47), color=color.orange)
+
+def advance_spread(dt):
+    global spread_clock
+    spread_clock = min(spread_clock + dt, MAX_SPREAD_STEPS_PER_FRAME / SPREAD_RATE)
+    while spread_clock >= 1.0 / SPREAD_RATE:
+        spread_clock -= 1.0 / SPREAD_RATE
+        spread_model.step()
 
 def update():
+    global highlighted, pending_scan, popup_closed
+    if popup_closed:
+        dt = 0.0  # Time spent reading the report is neither driving, outbreak nor frame time
+        popup_closed = False
+    else:
+        dt = min(time.dt, MAX_FRAME_DT)
+        metrics.observe("sim_frame", time.dt)
     camera.x = bot.x; camera.z = bot.z - 50
+    if spread_model: advance_spread(dt)
+    texture_loader.poll()
+    if pending_scan and texture_loader.ready(pending_scan[0]):
+        finish_scan_sequence(*pending_scan)
+        pending_scan = None
     if not image_panel.enabled:
-        speed = 20 * time.dt
+        speed = BOT_SPEED * dt
+        if autopilot_route and any(held_keys[k] for k in 'wasd'):
+            toggle_autopilot()  # Manual driving takes over
+        if autopilot_route and not pending_scan:
+            drive_autopilot(dt)
         if held_keys['w']: bot.z += speed
         if held_keys['s']: bot.z -= speed
         if held_keys['a']: bot.x -= speed
         if held_keys['d']: bot.x += speed
-        for plant in crops:
-            if distance(bot, plant) < 5.0:
-                plant.children[0].color = color.yellow
-                if held_keys['space']: open_scan_sequence(plant)
-            else:
-                plant.children[0].color = color.green
+        chunk_manager.update(bot.x, bot.z)
+
+        # Only the cells around the bot can be in range; recolor on state change only
+        with metrics.timed("sim_proximity"):
+            highlighted, left, entered = scan_range_changes(crop_index, bot.x, bot.z, highlighted)
+            for plant in left:
+                set_highlight(plant, False)
+            for plant in entered:
+                set_highlight(plant, True)
+        prefetch_nearby_images()
+
+def input(key):
+    # Scan once per key press (holding space no longer re-triggers every frame)
+    if key == 'space' and highlighted and not image_panel.enabled:
+        open_scan_sequence(min(highlighted, key=lambda p: (p.x - bot.x) ** 2 + (p.z - bot.z) ** 2))
+    if key == 'p' and not image_panel.enabled:
+        toggle_autopilot()
 
 if __name__ == "__main__":
     app.run()
\ No newline at end of file
@@ -0,0 +1,144 @@
+import argparse
+import json
+import sys
+import time
+import numpy as np
+from agrotwin_field import CONFIG_FILE, load_jury_config
+
+# --- CONFIGURATION ---
+HEALTHY, INFECTED = 0, 1  # Same cell codes as the packed field state
+DEFAULT_P_ORTH = 0.05     # chance per step that an infected N/S/E/W neighbour passes it on
+DEFAULT_P_DIAG = 0.02     # same for each diagonal neighbour
+DEFAULT_RECOVERY = 0.0    # chance per step that an infected plant recovers (e.g. after treatment)
+
+# --- SPREAD MODEL ---
+def neighbour_counts(cells, width):
+    """
+    (orthogonal, diagonal) infected-neighbour counts, a 3x3 stencil over the
+    flattened zero-bordered grid (`width` = padded row length). Entry i
+    belongs to padded cell i + width + 1, so border cells are never read past.
+    """
+    lo, hi = width + 1, cells.size - width - 1
+    orth = cells[lo - width:hi - width] + cells[lo + width:hi + width] + cells[lo - 1:hi - 1] + cells[lo + 1:hi + 1]
+    diag = cells[lo - width - 1:hi - width - 1] + cells[lo - width + 1:hi - width + 1] + cells[lo + width - 1:hi + width - 1] + cells[lo + width + 1:hi + width + 1]
+    return orth, diag
+
+class SpreadModel:
+    """
+    Time-stepped infection spread over the row/col grid.
+    Each step a healthy plant with k_o infected orthogonal and k_d infected
+    diagonal neighbours becomes infected with probability
+    1 - (1 - p_orth)^k_o * (1 - p_diag)^k_d (looked up from a 5x5 table), and
+    an infected plant recovers with probability `recovery`. Random numbers are
+    only drawn for plants actually at risk, so quiet parts of a large field
+    cost one stencil pass. Listeners get (rows, cols, states) of every cell
+    that changed, to push the outbreak into the scene or a report.
+    """
+    def __init__(self, grid_size, infected=(), p_orth=DEFAULT_P_ORTH, p_diag=DEFAULT_P_DIAG, recovery=DEFAULT_RECOVERY, seed=None, state=None):
+        self.grid_size = grid_size
+        # The grid lives inside a zero border so the stencil never needs padding per step; `state` is a view of it
+        self.padded = np.zeros((grid_size + 2, grid_size + 2), np.uint8)
+        self.state = self.padded[1:-1, 1:-1]
+        self.width = grid_size + 2
+        self.cells = self.padded.reshape(-1)
+        # Stencil entries that are real plants rather than the left/right border columns
+        padded_col = np.arange(self.width + 1, self.cells.size - self.width - 1) % self.width
+        self.interior = (padded_col >= 1) & (padded_col <= grid_size)
+        if state is not None:
+            self.state[:] = np.asarray(state).reshape(grid_size, grid_size) == INFECTED
+        for row, col in infected:
+            self.state[row, col] = INFECTED
+        self.recovery = recovery
+        self.rng = np.random.default_rng(seed)
+        self.listeners = []
+        self.t = 0
+        k = np.arange(5)
+        self.infection_odds = 1.0 - np.outer((1.0 - p_orth) ** k, (1.0 - p_diag) ** k)
+
+    @classmethod
+    def from_field_state(cls, field_state, **kwargs):
+        """Starts from a packed field (agrotwin_fieldstate.FieldState); the file itself is never written."""
+        return cls(field_state.grid_size, state=np.asarray(field_state.state), **kwargs)
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    @property
+    def infected_count(self):
+        return int(np.count_nonzero(self.state))
+
+    def step(self):
+        """Advances one step; returns (rows, cols) of newly infected cells and (rows, cols) of recovered ones."""
+        cells, width = self.cells, self.width
+        orth, diag = neighbour_counts(cells, width)
+        centre = cells[width + 1:cells.size - width - 1]
+        at_risk = np.flatnonzero((orth + diag > 0) & (centre == HEALTHY) & self.interior)
+        odds = self.infection_odds[orth[at_risk], diag[at_risk]]
+        infected_now = at_risk[self.rng.random(at_risk.size) < odds] + (width + 1)
+        if self.recovery > 0:
+            sick = np.flatnonzero(cells)
+            recovered = sick[self.rng.random(sick.size) < self.recovery]
+            cells[recovered] = HEALTHY
+        else:
+            recovered = infected_now[:0]
+        cells[infected_now] = INFECTED
+        self.t += 1
+        infected_now, recovered = self.to_grid(infected_now), self.to_grid(recovered)
+        if self.listeners and (infected_now[0].size or recovered[0].size):
+            changed_rows = np.concatenate([infected_now[0], recovered[0]])
+            changed_cols = np.concatenate([infected_now[1], recovered[1]])
+            states = self.state[changed_rows, changed_cols]
+            for callback in self.listeners:
+                callback(changed_rows, changed_cols, states)
+        return infected_now, recovered
+
+    def to_grid(self, padded_indices):
+        rows, cols = np.divmod(padded_indices, self.width)
+        return rows - 1, cols - 1
+
+    def run(self, steps):
+        """Steps `steps` times; returns the infected count after each step."""
+        curve = np.empty(steps, np.int64)
+        for i in range(steps):
+            self.step()
+            curve[i] = np.count_nonzero(self.state)
+        return curve
+
+# --- CLI ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate an outbreak spreading from the jury's seeded plants.")
+    parser.add_argument("--config", default=CONFIG_FILE, help="jury seeding file (initial infections)")
+    parser.add_argument("--state", help="packed field (agrotwin_fieldstate.py) to start from instead of --config")
+    parser.add_argument("--grid-size", type=int, help="override the configured field size")
+    parser.add_argument("--steps", type=int, default=1000)
+    parser.add_argument("--p-orth", type=float, default=DEFAULT_P_ORTH)
+    parser.add_argument("--p-diag", type=float, default=DEFAULT_P_DIAG)
+    parser.add_argument("--recovery", type=float, default=DEFAULT_RECOVERY)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--every", type=int, default=0, help="also print the infected count every N steps")
+    args = parser.parse_args(argv)
+
+    options = {"p_orth": args.p_orth, "p_diag": args.p_diag, "recovery": args.recovery, "seed": args.seed}
+    if args.state:
+        from agrotwin_fieldstate import FieldState
+        model = SpreadModel.from_field_state(FieldState(args.state), **options)
+    else:
+        config_size, spots = load_jury_config(args.config)
+        size = args.grid_size or config_size
+        model = SpreadModel(size, [(r, c) for r, c in spots if r < size and c < size], **options)
+
+    initial = model.infected_count
+    started = time.perf_counter()
+    curve = model.run(args.steps)
+    elapsed = time.perf_counter() - started
+    if args.every:
+        for i in range(args.every - 1, args.steps, args.every):
+            print(json.dumps({"step": i + 1, "infected": int(curve[i])}))
+    print(json.dumps({
+        "grid_size": model.grid_size, "steps": args.steps, "initial_infected": initial,
+        "final_infected": model.infected_count, "infected_share": round(model.infected_count / model.grid_size ** 2, 4),
+        "seconds": round(elapsed, 4), "steps_per_second": round(args.steps / elapsed, 1) if elapsed else None,
+    }), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
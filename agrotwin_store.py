@@ -0,0 +1,263 @@
+import atexit
+import copy
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from agrotwin_metrics import metrics
+from agrotwin_files import atomic_open
+
+# --- JSON LEARNING STORE (batched, atomic) ---
+DEFAULT_FLUSH_INTERVAL = 5.0  # seconds between a weight update and the write that persists it
+
+class JsonLearningStore:
+    """
+    In-memory home of the question weights ({category: [{"q", "weight"}, ...]}).
+    Updates apply immediately; the file is rewritten at most once per
+    `flush_interval` (and at interpreter exit), via a temp file + rename so a
+    crash mid-write never leaves a truncated database behind.
+    """
+    def __init__(self, path, default_kb, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.lock = threading.RLock()
+        self.timer = None
+        self.dirty = False
+        self.knowledge_base = self.load(default_kb)
+        atexit.register(self.flush)
+
+    def load(self, default_kb):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                pass
+        return copy.deepcopy(default_kb)
+
+    def apply_update(self, category, question_text, learning_rate):
+        """
+        W_new = W_old + (Learning_Rate * (1 - W_old)) for one question.
+        Returns (old_w, new_w), or None if the question is unknown.
+        """
+        with self.lock:
+            questions = self.knowledge_base[category]
+            for i, q_obj in enumerate(questions):
+                if q_obj["q"] == question_text: break
+            else:
+                return None
+            old_w = q_obj["weight"]
+            new_w = old_w + (learning_rate * (1.0 - old_w))
+            q_obj["weight"] = new_w
+            # Weights only grow, so one pass towards the front keeps the list sorted (highest first)
+            while i > 0 and questions[i - 1]["weight"] < new_w:
+                questions[i - 1], questions[i] = questions[i], questions[i - 1]
+                i -= 1
+            self.mark_dirty()
+            return old_w, new_w
+
+    def snapshot(self):
+        """[(category, [(question, weight), ...])] copied under the lock, safe to iterate from any thread."""
+        with self.lock:
+            return [(cat, [(q_obj["q"], q_obj["weight"]) for q_obj in questions]) for cat, questions in self.knowledge_base.items()]
+
+    def mark_dirty(self):
+        with self.lock:
+            self.dirty = True
+            if self.timer is None:
+                self.timer = threading.Timer(self.flush_interval, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def flush(self):
+        """Writes pending updates now (no-op if nothing changed)."""
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if not self.dirty: return
+            with metrics.timed("db_flush"):
+                with atomic_open(self.path) as f:
+                    json.dump(self.knowledge_base, f, indent=4)
+            self.dirty = False
+
+    def start_session(self, context):
+        """The JSON file keeps no session history."""
+        return None
+
+# --- SQLITE LEARNING STORE (shared by every chat session) ---
+DB_FILE = os.path.join("db", "custom.db")
+
+# Mirrors the QuestionWeight / ChatSession / ScanRecord models in prisma/schema.prisma
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS "QuestionWeight" (
+    "id" INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+    "category" TEXT NOT NULL,
+    "question" TEXT NOT NULL,
+    "weight" REAL NOT NULL,
+    "updatedAt" DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE UNIQUE INDEX IF NOT EXISTS "QuestionWeight_category_question_key" ON "QuestionWeight"("category", "question");
+CREATE TABLE IF NOT EXISTS "ChatSession" (
+    "id" TEXT NOT NULL PRIMARY KEY,
+    "crop" TEXT NOT NULL,
+    "disease" TEXT NOT NULL,
+    "status" TEXT NOT NULL,
+    "createdAt" DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS "ChatSession_crop_idx" ON "ChatSession"("crop");
+CREATE TABLE IF NOT EXISTS "ScanRecord" (
+    "id" INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+    "crop" TEXT NOT NULL,
+    "disease" TEXT NOT NULL,
+    "status" TEXT NOT NULL,
+    "location" TEXT,
+    "row" INTEGER,
+    "col" INTEGER,
+    "createdAt" DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS "ScanRecord_crop_disease_idx" ON "ScanRecord"("crop", "disease");
+"""
+
+def connect(path=DB_FILE):
+    """Opens the shared database in WAL mode (readers never block the writer) and ensures the tables exist."""
+    conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+class SqliteLearningStore:
+    """
+    Question weights, chat sessions and scans in db/custom.db, safe for many
+    concurrent agents. Like the JSON store it serves reads from memory and
+    batches writes, but a flush applies each question's pending updates as one
+    atomic SQL expression, W = 1 - (1 - W) * prod(1 - rate), which commutes
+    with other sessions' flushes, so nobody's clicks are lost. The in-memory
+    view is then reloaded so it also reflects the other sessions.
+    """
+    def __init__(self, default_kb, path=DB_FILE, import_from=None, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        self.lock = threading.RLock()
+        self.timer = None
+        self.pending = {}  # (category, question) -> product of (1 - rate) not yet written
+        self.conn = connect(path)
+        self.seed(default_kb, import_from)
+        self.knowledge_base = {}
+        self.reload()
+        atexit.register(self.flush)
+
+    def seed(self, default_kb, import_from):
+        """First run only: imports the legacy JSON weights (or the defaults) into an empty table."""
+        if self.conn.execute('SELECT 1 FROM "QuestionWeight" LIMIT 1').fetchone(): return
+        kb = default_kb
+        if import_from and os.path.exists(import_from):
+            try:
+                with open(import_from, 'r') as f:
+                    kb = json.load(f)
+            except (OSError, ValueError):
+                pass
+        rows = [(cat, q_obj["q"], q_obj["weight"]) for cat, questions in kb.items() for q_obj in questions]
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.executemany('INSERT OR IGNORE INTO "QuestionWeight" ("category", "question", "weight") VALUES (?, ?, ?)', rows)
+
+    def reload(self):
+        """Refreshes the in-memory view in place (callers hold references to its lists)."""
+        with self.lock:
+            rows = self.conn.execute('SELECT "category", "question", "weight" FROM "QuestionWeight" ORDER BY "id"').fetchall()
+            fresh = {}
+            for cat, question, weight in rows:
+                fresh.setdefault(cat, []).append({"q": question, "weight": weight})
+            # Re-apply updates that are still waiting for the next flush
+            for (cat, question), factor in self.pending.items():
+                for q_obj in fresh.get(cat, ()):
+                    if q_obj["q"] == question: q_obj["weight"] = 1.0 - (1.0 - q_obj["weight"]) * factor
+            for cat, questions in fresh.items():
+                questions.sort(key=lambda x: x['weight'], reverse=True)
+                self.knowledge_base.setdefault(cat, [])[:] = questions
+
+    def snapshot(self):
+        """Same as JsonLearningStore.snapshot; the timed flush reloads the view in place on its own thread."""
+        with self.lock:
+            return [(cat, [(q_obj["q"], q_obj["weight"]) for q_obj in questions]) for cat, questions in self.knowledge_base.items()]
+
+    def apply_update(self, category, question_text, learning_rate):
+        """Same contract as JsonLearningStore.apply_update: (old_w, new_w) or None."""
+        with self.lock:
+            questions = self.knowledge_base.get(category, [])
+            for i, q_obj in enumerate(questions):
+                if q_obj["q"] == question_text: break
+            else:
+                return None
+            old_w = q_obj["weight"]
+            new_w = old_w + (learning_rate * (1.0 - old_w))
+            q_obj["weight"] = new_w
+            while i > 0 and questions[i - 1]["weight"] < new_w:
+                questions[i - 1], questions[i] = questions[i], questions[i - 1]
+                i -= 1
+            key = (category, question_text)
+            self.pending[key] = self.pending.get(key, 1.0) * (1.0 - learning_rate)
+            if self.timer is None:
+                self.timer = threading.Timer(self.flush_interval, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+            return old_w, new_w
+
+    def flush(self):
+        """Writes pending increments in one transaction, then picks up other sessions' changes."""
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if not self.pending: return
+            updates = [(factor, cat, question) for (cat, question), factor in self.pending.items()]
+            with metrics.timed("db_flush"):
+                with self.conn:
+                    self.conn.execute("BEGIN IMMEDIATE")
+                    self.conn.executemany(
+                        'UPDATE "QuestionWeight" SET "weight" = 1.0 - (1.0 - "weight") * ?, "updatedAt" = CURRENT_TIMESTAMP '
+                        'WHERE "category" = ? AND "question" = ?', updates
+                    )
+                self.pending.clear()
+                self.reload()
+
+    def start_session(self, context):
+        """Records a consultation; returns its id."""
+        session_id = uuid.uuid4().hex
+        with self.lock:
+            self.conn.execute(
+                'INSERT INTO "ChatSession" ("id", "crop", "disease", "status") VALUES (?, ?, ?, ?)',
+                (session_id, context.get("crop", "Unknown"), context.get("disease", "Unknown"), context.get("status", "Unknown"))
+            )
+        return session_id
+
+# --- SCAN HISTORY ---
+class ScanHistory:
+    """Append-only log of simulator scans in the shared database, indexed by crop/disease."""
+    def __init__(self, path=DB_FILE):
+        self.conn = connect(path)
+        self.lock = threading.Lock()
+
+    def record(self, report, row=None, col=None):
+        with self.lock:
+            self.conn.execute(
+                'INSERT INTO "ScanRecord" ("crop", "disease", "status", "location", "row", "col") VALUES (?, ?, ?, ?, ?, ?)',
+                (report["crop"], report["disease"], report["status"], report.get("location"), row, col)
+            )
+
+    def recent(self, crop=None, limit=20):
+        query = 'SELECT "crop", "disease", "status", "location", "row", "col", "createdAt" FROM "ScanRecord"'
+        args = ()
+        if crop:
+            query += ' WHERE "crop" = ?'
+            args = (crop,)
+        return self.conn.execute(query + ' ORDER BY "id" DESC LIMIT ?', args + (limit,)).fetchall()
+
+# --- SELECTION ---
+def make_learning_store(default_kb, json_path):
+    """SQLite by default; AGROTWIN_LEARNING_STORE=json keeps the single-file store."""
+    if os.environ.get("AGROTWIN_LEARNING_STORE", "sqlite").lower() == "json":
+        return JsonLearningStore(json_path, default_kb)
+    return SqliteLearningStore(default_kb, import_from=json_path)
@@ -1,106 +1,261 @@
 import tkinter as tk
 from tkinter import messagebox
-import json
+import argparse
+import random
+from agrotwin_field import CONFIG_FILE, PATTERNS, encode_runs, save_jury_config
+
+# Colours
+HEALTHY = "#90EE90"   # Light Green (Healthy)
+INFECTED = "#FF6347"  # Tomato Red (Infected)
+GRID_LINE = "#5a8f5a"
+CANVAS_PX = 720       # Target on-screen size of the whole field
 
 class JuryInterface:
-    def __init__(self, root):
+    """
+    Seeding UI for fields of any size. The grid is one Canvas showing a single
+    PhotoImage (no widget per cell), the selection is a set of (row, col), and
+    a cell repaint is one image write. Click toggles, drag paints, Shift+drag
+    fills or clears a rectangle, and the pattern panel generates infections.
+    """
+    def __init__(self, root, grid_size=10, max_selections=15, config_path=CONFIG_FILE):
         self.root = root
         self.root.title("Agri Twin - Jury Seeding Interface")
-        
-        # Configuration
-        self.GRID_SIZE = 10
-        self.MAX_SELECTIONS = 15
-        self.selected_spots = []
-        self.buttons = {}
+
+        # Configuration (max_selections=0 means no limit)
+        self.GRID_SIZE = grid_size
+        self.MAX_SELECTIONS = max_selections
+        self.config_path = config_path
+        self.selected_spots = set()
+        self.cell = max(1, min(40, CANVAS_PX // grid_size))
+        self.gap = 1 if self.cell >= 6 else 0  # Grid lines only where cells are big enough to see them
+
+        # Drag state
+        self.drag_add = True
+        self.last_cell = None
+        self.area_start = None
+        self.area_outline = None
 
         # UI Layout
         self.create_header()
         self.create_grid()
+        self.create_pattern_panel()
         self.create_footer()
+        self.repaint()
 
     def create_header(self):
         header_frame = tk.Frame(self.root, pady=10)
         header_frame.pack()
-        
+
         tk.Label(header_frame, text="🌱 Agri Twin Simulation Setup", font=("Arial", 16, "bold")).pack()
-        self.status_label = tk.Label(
-            header_frame, 
-            text=f"Please select {self.MAX_SELECTIONS} spots to infect.", 
-            fg="blue",
-            font=("Arial", 12)
-        )
+        prompt = f"Please select {self.MAX_SELECTIONS} spots to infect." if self.MAX_SELECTIONS else "Select the spots to infect."
+        self.status_label = tk.Label(header_frame, text=prompt, fg="blue", font=("Arial", 12))
         self.status_label.pack()
+        tk.Label(
+            header_frame,
+            text=f"{self.GRID_SIZE}x{self.GRID_SIZE} field  |  Click: toggle  •  Drag: paint  •  Shift+Drag: fill area",
+            fg="#555555",
+            font=("Arial", 9)
+        ).pack()
 
     def create_grid(self):
-        grid_frame = tk.Frame(self.root, padx=20, pady=20)
+        grid_frame = tk.Frame(self.root, padx=20, pady=10)
         grid_frame.pack()
 
-        for row in range(self.GRID_SIZE):
-            for col in range(self.GRID_SIZE):
-                btn = tk.Button(
-                    grid_frame, 
-                    width=4, 
-                    height=2, 
-                    bg="#90EE90", # Light Green (Healthy)
-                    command=lambda r=row, c=col: self.toggle_spot(r, c)
-                )
-                btn.grid(row=row, column=col, padx=2, pady=2)
-                self.buttons[(row, col)] = btn
+        side = self.GRID_SIZE * self.cell
+        view = min(side, CANVAS_PX)
+        self.canvas = tk.Canvas(grid_frame, width=view, height=view, bg=GRID_LINE, highlightthickness=0,
+                                scrollregion=(0, 0, side, side))
+        if side > view:
+            x_scroll = tk.Scrollbar(grid_frame, orient=tk.HORIZONTAL, command=self.canvas.xview)
+            y_scroll = tk.Scrollbar(grid_frame, orient=tk.VERTICAL, command=self.canvas.yview)
+            self.canvas.configure(xscrollcommand=x_scroll.set, yscrollcommand=y_scroll.set)
+            y_scroll.grid(row=0, column=1, sticky="ns")
+            x_scroll.grid(row=1, column=0, sticky="ew")
+        self.canvas.grid(row=0, column=0)
+
+        self.image = tk.PhotoImage(width=side, height=side)
+        self.canvas.create_image(0, 0, image=self.image, anchor="nw")
+
+        self.canvas.bind("<ButtonPress-1>", self.on_press)
+        self.canvas.bind("<B1-Motion>", self.on_drag)
+        self.canvas.bind("<ButtonRelease-1>", self.on_release)
+
+    def create_pattern_panel(self):
+        panel = tk.Frame(self.root, pady=5)
+        panel.pack()
+
+        self.pattern = tk.StringVar(value="clusters")
+        tk.Label(panel, text="Pattern:").grid(row=0, column=0)
+        tk.OptionMenu(panel, self.pattern, *PATTERNS).grid(row=0, column=1)
+
+        # name -> (label, default)
+        fields = {
+            "percent": ("Density / Spread %", "5"),
+            "count": ("Clusters / Seeds", "4"),
+            "size": ("Radius / Steps", "3"),
+            "seed": ("Seed", ""),
+        }
+        self.pattern_inputs = {}
+        for i, (name, (label, default)) in enumerate(fields.items()):
+            tk.Label(panel, text=label).grid(row=1, column=i)
+            entry = tk.Entry(panel, width=8, justify="center")
+            entry.insert(0, default)
+            entry.grid(row=2, column=i, padx=4)
+            self.pattern_inputs[name] = entry
+
+        tk.Button(panel, text="GENERATE", command=self.generate_pattern).grid(row=0, column=2)
+        tk.Button(panel, text="CLEAR", command=self.clear_spots).grid(row=0, column=3)
 
     def create_footer(self):
         footer_frame = tk.Frame(self.root, pady=10)
         footer_frame.pack()
-        
+
         save_btn = tk.Button(
-            footer_frame, 
-            text="SAVE CONFIGURATION & LAUNCH", 
-            bg="black", 
-            fg="white", 
+            footer_frame,
+            text="SAVE CONFIGURATION & LAUNCH",
+            bg="black",
+            fg="white",
             font=("Arial", 12, "bold"),
             command=self.save_data
         )
         save_btn.pack()
 
-    def toggle_spot(self, row, col):
-        coord = {"row": row, "col": col}
-        
-        # If already selected, deselect it
-        if coord in self.selected_spots:
-            self.selected_spots.remove(coord)
-            self.buttons[(row, col)].config(bg="#90EE90") # Back to Green
-            
-        # If not selected, check limit then select
-        elif len(self.selected_spots) < self.MAX_SELECTIONS:
-            self.selected_spots.append(coord)
-            self.buttons[(row, col)].config(bg="#FF6347") # Tomato Red (Infected)
-            
+    # --- Painting ---
+    def paint_cell(self, row, col, color):
+        x, y = col * self.cell, row * self.cell
+        self.image.put(color, to=(x, y, x + self.cell - self.gap, y + self.cell - self.gap))
+
+    def repaint(self):
+        """Redraws the whole field: one write per cell when grid lines are shown, else one per run of infected cells."""
+        if self.gap:
+            self.image.put(GRID_LINE, to=(0, 0, self.GRID_SIZE * self.cell, self.GRID_SIZE * self.cell))
+            for row in range(self.GRID_SIZE):
+                for col in range(self.GRID_SIZE):
+                    self.paint_cell(row, col, INFECTED if (row, col) in self.selected_spots else HEALTHY)
         else:
-            messagebox.showwarning("Limit Reached", f"You can only select {self.MAX_SELECTIONS} spots!")
+            self.image.put(HEALTHY, to=(0, 0, self.GRID_SIZE * self.cell, self.GRID_SIZE * self.cell))
+            for row, col, length in encode_runs(self.selected_spots):
+                self.image.put(INFECTED, to=(col * self.cell, row * self.cell, (col + length) * self.cell, (row + 1) * self.cell))
+        self.update_status()
 
-        # Update label
+    def update_status(self, warning=None):
         count = len(self.selected_spots)
-        self.status_label.config(text=f"Selected: {count} / {self.MAX_SELECTIONS}")
+        text = f"Selected: {count} / {self.MAX_SELECTIONS}" if self.MAX_SELECTIONS else f"Selected: {count}"
+        self.status_label.config(text=f"{text}  ({warning})" if warning else text, fg="red" if warning else "blue")
+
+    # --- Selection ---
+    def set_spots(self, cells, add):
+        """Adds or removes cells, honouring MAX_SELECTIONS. Returns False if the limit cut the change short."""
+        complete = True
+        for cell in cells:
+            if add:
+                if cell in self.selected_spots: continue
+                if self.MAX_SELECTIONS and len(self.selected_spots) >= self.MAX_SELECTIONS:
+                    complete = False
+                    break
+                self.selected_spots.add(cell)
+                self.paint_cell(*cell, INFECTED)
+            elif cell in self.selected_spots:
+                self.selected_spots.discard(cell)
+                self.paint_cell(*cell, HEALTHY)
+        self.update_status(None if complete else "limit reached")
+        return complete
+
+    def cell_at(self, event):
+        col = int(self.canvas.canvasx(event.x)) // self.cell
+        row = int(self.canvas.canvasy(event.y)) // self.cell
+        return min(max(row, 0), self.GRID_SIZE - 1), min(max(col, 0), self.GRID_SIZE - 1)
+
+    def on_press(self, event):
+        cell = self.cell_at(event)
+        # The first cell decides whether this gesture infects or heals
+        self.drag_add = cell not in self.selected_spots
+        if event.state & 0x0001:  # Shift: area selection
+            self.area_start = cell
+            self.area_outline = self.canvas.create_rectangle(0, 0, 0, 0, outline="black", dash=(4, 2))
+            self.on_drag(event)
+            return
+        self.last_cell = cell
+        if not self.set_spots([cell], self.drag_add):
+            messagebox.showwarning("Limit Reached", f"You can only select {self.MAX_SELECTIONS} spots!")
+
+    def on_drag(self, event):
+        cell = self.cell_at(event)
+        if self.area_start is not None:
+            (r0, c0), (r1, c1) = self.area_start, cell
+            self.canvas.coords(self.area_outline, min(c0, c1) * self.cell, min(r0, r1) * self.cell,
+                               (max(c0, c1) + 1) * self.cell, (max(r0, r1) + 1) * self.cell)
+            return
+        if self.last_cell is None or cell == self.last_cell: return
+        # Fill in the cells a fast stroke skipped between two motion events
+        (r0, c0), (r1, c1) = self.last_cell, cell
+        steps = max(abs(r1 - r0), abs(c1 - c0))
+        stroke = [(round(r0 + (r1 - r0) * i / steps), round(c0 + (c1 - c0) * i / steps)) for i in range(1, steps + 1)]
+        self.last_cell = cell
+        self.set_spots(stroke, self.drag_add)
+
+    def on_release(self, event):
+        if self.area_start is not None:
+            (r0, c0), (r1, c1) = self.area_start, self.cell_at(event)
+            self.canvas.delete(self.area_outline)
+            self.area_start = self.area_outline = None
+            area = [(row, col) for row in range(min(r0, r1), max(r0, r1) + 1) for col in range(min(c0, c1), max(c0, c1) + 1)]
+            self.set_spots(area, self.drag_add)
+        self.last_cell = None
+
+    def clear_spots(self):
+        self.selected_spots = set()
+        self.repaint()
+
+    def generate_pattern(self):
+        try:
+            values = {name: entry.get().strip() for name, entry in self.pattern_inputs.items()}
+            percent = float(values["percent"]) / 100.0
+            count, size = int(values["count"]), float(values["size"])
+            rng = random.Random(int(values["seed"])) if values["seed"] else random.Random()
+        except ValueError:
+            messagebox.showerror("Error", "Pattern settings must be numbers.")
+            return
+
+        name = self.pattern.get()
+        if name == "random":
+            spots = PATTERNS[name](self.GRID_SIZE, percent, rng)
+        elif name == "clusters":
+            spots = PATTERNS[name](self.GRID_SIZE, count, size, rng)
+        else:
+            spots = PATTERNS[name](self.GRID_SIZE, count, int(size), percent, rng)
+
+        warning = None
+        if self.MAX_SELECTIONS and len(spots) > self.MAX_SELECTIONS:
+            spots = set(rng.sample(sorted(spots), self.MAX_SELECTIONS))
+            warning = f"pattern thinned to {self.MAX_SELECTIONS}"
+        self.selected_spots = spots
+        self.repaint()
+        if warning: self.update_status(warning)
 
     def save_data(self):
-        if len(self.selected_spots) != self.MAX_SELECTIONS:
+        if self.MAX_SELECTIONS and len(self.selected_spots) != self.MAX_SELECTIONS:
             messagebox.showerror("Error", f"Please select exactly {self.MAX_SELECTIONS} spots.")
             return
+        if not self.selected_spots:
+            messagebox.showerror("Error", "Please select at least one spot.")
+            return
 
-        data = {
-            "grid_size": self.GRID_SIZE,
-            "defective_spots": self.selected_spots
-        }
-
-        # Save to JSON file
+        # Save to JSON file (row-wise runs, not one object per spot)
         try:
-            with open("field_config.json", "w") as f:
-                json.dump(data, f, indent=4)
+            save_jury_config(self.GRID_SIZE, self.selected_spots, self.config_path)
             messagebox.showinfo("Success", "Field Configuration Saved!\nReady for Simulation.")
             self.root.destroy() # Close the window
         except Exception as e:
             messagebox.showerror("File Error", str(e))
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Choose which plants start out infected.")
+    parser.add_argument("--grid-size", type=int, default=10, help="plants per side of the field")
+    parser.add_argument("--max-selections", type=int, default=15, help="exact number of spots to infect (0 = any number)")
+    parser.add_argument("--config", default=CONFIG_FILE, help="where to save the seeding file")
+    args = parser.parse_args()
+
     root = tk.Tk()
-    app = JuryInterface(root)
-    root.mainloop()
\ No newline at end of file
+    app = JuryInterface(root, args.grid_size, args.max_selections, args.config)
+    root.mainloop()
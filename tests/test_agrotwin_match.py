@@ -0,0 +1,58 @@
+import difflib
+import itertools
+import random
+
+from agrotwin_match import QuestionIndex
+
+def brute_force(questions, query, threshold=0.8):
+    """The full scan nlp_match ran before the index: best ratio above threshold, first one wins ties."""
+    best = None
+    for i, text in enumerate(questions):
+        ratio = difflib.SequenceMatcher(None, query.lower(), text.lower()).ratio()
+        if ratio > threshold and (best is None or ratio > best[0]):
+            best = (ratio, i)
+    return best
+
+def build(questions):
+    index = QuestionIndex()
+    for i, text in enumerate(questions):
+        index.add(text, i)
+    return index
+
+def typo(text, rng, edits):
+    chars = list(text)
+    for _ in range(edits):
+        i = rng.randrange(len(chars))
+        op = rng.choice("sid")
+        if op == "s": chars[i] = rng.choice("abcdefghijklmnopqrstuvwxyz ")
+        elif op == "i": chars.insert(i, rng.choice("abcdefghijklmnopqrstuvwxyz"))
+        elif len(chars) > 1: del chars[i]
+    return "".join(chars)
+
+def test_word_order_permutations_match_full_scan():
+    # Questions that share nearly all bigrams and differ in word order: ranking by bigram
+    # overlap alone (e.g. keeping only the top k) drops the question difflib actually prefers
+    rng = random.Random(0)
+    permutations = [" ".join(p) for p in itertools.permutations(["what", "is", "the", "best", "copper", "spray", "dose"])]
+    rng.shuffle(permutations)
+    questions = permutations[:40] + [permutations[0].replace("copper", "coper")]
+    index = build(questions)
+    for _ in range(200):
+        query = typo(rng.choice(permutations), rng, rng.randint(0, 2))
+        assert index.best_match(query) == brute_force(questions, query), query
+
+def test_typos_and_unrelated_queries_match_full_scan():
+    rng = random.Random(1)
+    vocab = "what when how should can is the best time to spray leaves soil dosage per acre organic pesticide tomato potato blight rust".split()
+    questions = [" ".join(rng.choice(vocab) for _ in range(rng.randint(4, 9))) + "?" for _ in range(200)]
+    index = build(questions)
+    for _ in range(150):
+        if rng.random() < 0.7:
+            query = typo(rng.choice(questions), rng, rng.randint(0, 6))
+        else:
+            query = " ".join(rng.choice(vocab) for _ in range(6))
+        assert index.best_match(query) == brute_force(questions, query), query
+
+def test_empty_index_and_empty_query():
+    assert QuestionIndex().best_match("anything") is None
+    assert build(["What pesticide should I use?"]).best_match("") is None